@@ -0,0 +1,26 @@
+"""Add an index on revoked_tokens.revoked_at
+
+Revision ID: 2b6f0d9e4a37
+Revises: d8f35a2c6e17
+Create Date: 2026-10-17 19:12:08.531746
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b6f0d9e4a37'
+down_revision = 'd8f35a2c6e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.create_index('ix_revoked_tokens_revoked_at', ['revoked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.drop_index('ix_revoked_tokens_revoked_at')
@@ -0,0 +1,33 @@
+"""Add revoked_tokens table
+
+Revision ID: 8f2a4c6d1e93
+Revises: 3c9d1e7a5b21
+Create Date: 2026-10-17 10:03:54.118265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2a4c6d1e93'
+down_revision = '3c9d1e7a5b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revoked_tokens',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('jti', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('jti')
+    )
+
+
+def downgrade():
+    op.drop_table('revoked_tokens')
@@ -0,0 +1,43 @@
+"""Add per-employee yearly payroll totals
+
+Revision ID: a7c4e19b3d62
+Revises: f3a8d62c4b19
+Create Date: 2026-10-17 15:21:07.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c4e19b3d62'
+down_revision = 'f3a8d62c4b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('employee_payroll_years',
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('gross_amount', sa.Float(), nullable=False),
+    sa.Column('deductions', sa.Float(), nullable=False),
+    sa.Column('net_amount', sa.Float(), nullable=False),
+    sa.Column('payment_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('employee_id', 'year')
+    )
+    # Backfill from the existing salary payments
+    if op.get_bind().dialect.name == 'sqlite':
+        year = "CAST(strftime('%Y', payment_date) AS INTEGER)"
+    else:
+        year = "CAST(EXTRACT(YEAR FROM payment_date) AS INTEGER)"
+    op.execute(
+        "INSERT INTO employee_payroll_years (employee_id, year, gross_amount, deductions, net_amount, payment_count) "
+        f"SELECT employee_id, {year}, SUM(gross_amount), SUM(COALESCE(deductions, 0)), SUM(net_amount), COUNT(*) FROM salaries "
+        f"GROUP BY employee_id, {year}"
+    )
+
+
+def downgrade():
+    op.drop_table('employee_payroll_years')
@@ -0,0 +1,54 @@
+"""Add company-scoped indexes for income, expense and invoice filters
+
+Revision ID: b7e3f1a09c42
+Revises: 8f2a4c6d1e93
+Create Date: 2026-10-17 11:20:07.553902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f1a09c42'
+down_revision = '8f2a4c6d1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('income', schema=None) as batch_op:
+        batch_op.create_index('ix_income_company_date', ['company_id', 'date_received'], unique=False)
+        batch_op.create_index('ix_income_company_category_date', ['company_id', 'category', 'date_received'], unique=False)
+        batch_op.create_index('ix_income_company_user_date', ['company_id', 'user_id', 'date_received'], unique=False)
+
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.create_index('ix_expenses_company_date', ['company_id', 'date_incurred'], unique=False)
+        batch_op.create_index('ix_expenses_company_category_date', ['company_id', 'category', 'date_incurred'], unique=False)
+        batch_op.create_index('ix_expenses_company_vendor_date', ['company_id', 'vendor', 'date_incurred'], unique=False)
+        batch_op.create_index('ix_expenses_company_user_date', ['company_id', 'user_id', 'date_incurred'], unique=False)
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.create_index('ix_invoices_company_issue_date', ['company_id', 'issue_date'], unique=False)
+        batch_op.create_index('ix_invoices_company_status_issue_date', ['company_id', 'status', 'issue_date'], unique=False)
+        batch_op.create_index('ix_invoices_company_customer_issue_date', ['company_id', 'customer_name', 'issue_date'], unique=False)
+        batch_op.create_index('ix_invoices_company_user_issue_date', ['company_id', 'user_id', 'issue_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoices_company_user_issue_date')
+        batch_op.drop_index('ix_invoices_company_customer_issue_date')
+        batch_op.drop_index('ix_invoices_company_status_issue_date')
+        batch_op.drop_index('ix_invoices_company_issue_date')
+
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.drop_index('ix_expenses_company_user_date')
+        batch_op.drop_index('ix_expenses_company_vendor_date')
+        batch_op.drop_index('ix_expenses_company_category_date')
+        batch_op.drop_index('ix_expenses_company_date')
+
+    with op.batch_alter_table('income', schema=None) as batch_op:
+        batch_op.drop_index('ix_income_company_user_date')
+        batch_op.drop_index('ix_income_company_category_date')
+        batch_op.drop_index('ix_income_company_date')
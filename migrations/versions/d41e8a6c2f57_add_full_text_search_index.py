@@ -0,0 +1,46 @@
+"""Add full-text search index (SQLite FTS5)
+
+Revision ID: d41e8a6c2f57
+Revises: b7e3f1a09c42
+Create Date: 2026-10-17 12:05:41.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41e8a6c2f57'
+down_revision = 'b7e3f1a09c42'
+branch_labels = None
+depends_on = None
+
+# Kept in sync with src/utils/search.py (rowid = id * 8 + type code)
+ENTITIES = (
+    (1, 'expenses', 'description', ('vendor', 'notes')),
+    (2, 'income', 'description', ('notes',)),
+    (3, 'invoices', 'customer_name', ('invoice_number', 'notes')),
+    (4, 'inventory_items', 'name', ('sku', 'description')),
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "company_key, title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    # Index the existing rows
+    for code, table, title, body_columns in ENTITIES:
+        body_sql = " || ' ' || ".join(f"COALESCE({column}, '')" for column in body_columns)
+        op.execute(
+            f"INSERT INTO search_index (rowid, company_key, title, body) "
+            f"SELECT id * 8 + {code}, 'c' || company_id, COALESCE({title}, ''), {body_sql} FROM {table}"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS search_index")
@@ -0,0 +1,44 @@
+"""Add indexes for employee, salary, invoice item and company member lookups
+
+Revision ID: d8f35a2c6e17
+Revises: c5e81b7f2a94
+Create Date: 2026-10-17 17:05:44.218306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f35a2c6e17'
+down_revision = 'c5e81b7f2a94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.create_index('ix_employees_company_name', ['company_id', 'last_name', 'first_name'], unique=False)
+
+    with op.batch_alter_table('salaries', schema=None) as batch_op:
+        batch_op.create_index('ix_salaries_employee_payment_date', ['employee_id', 'payment_date'], unique=False)
+
+    with op.batch_alter_table('invoice_items', schema=None) as batch_op:
+        batch_op.create_index('ix_invoice_items_invoice_id', ['invoice_id'], unique=False)
+
+    with op.batch_alter_table('company_users', schema=None) as batch_op:
+        batch_op.create_index('ix_company_users_company_user', ['company_id', 'user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('company_users', schema=None) as batch_op:
+        batch_op.drop_index('ix_company_users_company_user')
+
+    with op.batch_alter_table('invoice_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoice_items_invoice_id')
+
+    with op.batch_alter_table('salaries', schema=None) as batch_op:
+        batch_op.drop_index('ix_salaries_employee_payment_date')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index('ix_employees_company_name')
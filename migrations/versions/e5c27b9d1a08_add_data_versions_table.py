@@ -0,0 +1,31 @@
+"""Add data_versions table
+
+Revision ID: e5c27b9d1a08
+Revises: d41e8a6c2f57
+Create Date: 2026-10-17 13:12:26.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c27b9d1a08'
+down_revision = 'd41e8a6c2f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_versions',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id', 'entity')
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions')
@@ -0,0 +1,41 @@
+"""Add daily income/expense aggregate tables
+
+Revision ID: f3a8d62c4b19
+Revises: e5c27b9d1a08
+Create Date: 2026-10-17 14:02:48.305117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d62c4b19'
+down_revision = 'e5c27b9d1a08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table_name, source_table, date_column in (('daily_income_agg', 'income', 'date_received'),
+                                                  ('daily_expense_agg', 'expenses', 'date_incurred')):
+        op.create_table(table_name,
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('company_id', 'day', 'category')
+        )
+        # Backfill from the existing records
+        op.execute(
+            f"INSERT INTO {table_name} (company_id, day, category, total, count) "
+            f"SELECT company_id, {date_column}, COALESCE(category, ''), SUM(amount), COUNT(*) FROM {source_table} "
+            f"GROUP BY company_id, {date_column}, COALESCE(category, '')"
+        )
+
+
+def downgrade():
+    op.drop_table('daily_expense_agg')
+    op.drop_table('daily_income_agg')
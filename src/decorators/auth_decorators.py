@@ -1,20 +1,150 @@
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, g, abort
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import and_, select
+from src.extensions import db, access_cache
 from src.models.user import User, RoleEnum # Import RoleEnum
+from src.models.company import Company
+from src.models.company_user import CompanyUser
+from src.models.enums import CompanyRoleEnum
+from src.utils.role_claims import access_from_claims, system_role_from_claims
+
+# Convenience role sets for company_access_required
+ALL_COMPANY_ROLES = (CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER)
+EDITOR_ROLES = (CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR)
+ADMIN_ROLES = (CompanyRoleEnum.ADMIN,)
+
+
+def _current_user_id():
+    """Returns the user id from the verified JWT, or None if the identity is malformed."""
+    try:
+        return int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return None
+
 
 def system_admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request() # Ensures a valid JWT is present
-        current_user_id_str = get_jwt_identity()
-        try:
-            current_user_id = int(current_user_id_str)
-        except ValueError:
+        current_user_id = _current_user_id()
+        if current_user_id is None:
             return jsonify(message="Invalid user identity in token"), 401
-            
-        user = User.query.get(current_user_id)
-        if not user or user.role != RoleEnum.SYSTEM_ADMIN: # Check only for SYSTEM_ADMIN
+
+        system_role = system_role_from_claims(current_user_id) or access_cache.get((current_user_id, None))
+        if system_role is None:
+            user = User.query.get(current_user_id)
+            if user:
+                system_role = user.role
+                access_cache.set((current_user_id, None), system_role)
+        if system_role != RoleEnum.SYSTEM_ADMIN: # Check only for SYSTEM_ADMIN
             return jsonify(message="System administrator access required"), 403
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+class CompanyAccess:
+    """
+    Authorization context for a company-scoped request.
+    Holds only the ids and roles needed for permission checks; the full User and Company
+    objects are fetched lazily through the session identity map when a handler needs them.
+    """
+    __slots__ = ("user_id", "company_id", "system_role", "owner_id", "role_in_company")
+
+    def __init__(self, user_id, company_id, system_role, owner_id, role_in_company):
+        self.user_id = user_id
+        self.company_id = company_id
+        self.system_role = system_role
+        self.owner_id = owner_id
+        self.role_in_company = role_in_company # None if the user is not a member
+
+    @property
+    def is_system_admin(self):
+        return self.system_role == RoleEnum.SYSTEM_ADMIN
+
+    @property
+    def is_owner(self):
+        return self.owner_id == self.user_id
+
+    @property
+    def is_member(self):
+        return self.role_in_company is not None
+
+    @property
+    def user(self):
+        return db.session.get(User, self.user_id)
+
+    @property
+    def company(self):
+        return db.session.get(Company, self.company_id)
+
+    def allows(self, roles=None, allow_owner=True, allow_system_admin=True):
+        """True if the user may act on the company: a system admin (if allowed), the owner (if allowed), or a member holding one of `roles`."""
+        if allow_system_admin and self.is_system_admin:
+            return True
+        if allow_owner and self.is_owner:
+            return True
+        if roles and self.role_in_company in roles:
+            return True
+        return False
+
+
+def load_company_access(user_id, company_id):
+    """
+    Loads the user, the company and the user's membership row in one joined query.
+    Returns None if the user does not exist, or a CompanyAccess with company_id=None if the company does not exist.
+    """
+    row = db.session.execute(
+        select(User, Company, CompanyUser)
+        .select_from(User)
+        .outerjoin(Company, Company.id == company_id)
+        .outerjoin(CompanyUser, and_(CompanyUser.user_id == User.id, CompanyUser.company_id == Company.id))
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    user, company, membership = row
+    return CompanyAccess(
+        user_id=user.id,
+        company_id=company.id if company else None,
+        system_role=user.role,
+        owner_id=company.owner_id if company else None,
+        role_in_company=membership.role_in_company if membership else None,
+    )
+
+
+def company_access_required(roles=None, allow_owner=True, allow_system_admin=True,
+                            message="Unauthorized to access this company"):
+    """
+    Decorator for routes that take a `company_id` URL parameter.
+    Verifies the JWT, loads the authorization context (from fresh token role claims, access_cache,
+    or with a single query) and stores it on
+    `g.company_access` for the handler and helpers to reuse.
+    - roles: CompanyRoleEnum values that are permitted (None/empty means members are not enough).
+    - allow_owner / allow_system_admin: whether the company owner / a SYSTEM_ADMIN is permitted regardless of membership.
+    - message: the 403 message returned when access is denied.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            user_id = _current_user_id()
+            if user_id is None:
+                return jsonify({"message": "Authentication required"}), 401
+
+            company_id = kwargs.get("company_id")
+            access = access_from_claims(user_id, company_id) or access_cache.get((user_id, company_id))
+            if access is None:
+                access = load_company_access(user_id, company_id)
+                if access is None:
+                    return jsonify({"message": "Authentication required"}), 401
+                if access.company_id is None:
+                    abort(404)
+                access_cache.set((user_id, company_id), access)
+
+            g.company_access = access
+            if not access.allows(roles, allow_owner=allow_owner, allow_system_admin=allow_system_admin):
+                return jsonify({"message": message}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,83 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response, current_app, g
+from src.extensions import db, report_cache
+from src.utils.data_versions import get_versions
+from src.utils.streaming import wants_ndjson
+
+
+def conditional_get(*entities, weak=False):
+    """
+    Adds ETag / Last-Modified to a company-scoped GET endpoint and answers If-None-Match /
+    If-Modified-Since with 304 before the handler runs.
+    - entities: the data_versions entities the response is built from.
+    - weak: use a weak ETag, for responses that embed volatile values such as a generation time.
+    Must be applied below company_access_required, so that authorization is checked first.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(company_id, *args, **kwargs):
+            versions = get_versions(db.session, company_id, entities)
+            g.data_versions = (entities, versions) # Reused by cached_report
+            # The representation also depends on the query string (filters, fields, cursor) and on the negotiated format
+            key = [request.full_path, request.headers.get("Accept", "")]
+            for entity in entities:
+                version, updated_at = versions.get(entity, (0, None))
+                key.append(f"{entity}:{version}:{updated_at.isoformat() if updated_at else ''}")
+            etag = hashlib.sha1("\n".join(key).encode("utf-8")).hexdigest()[:32]
+            last_modified = max((updated_at for _, updated_at in versions.values()), default=None)
+            if last_modified:
+                last_modified = last_modified.replace(microsecond=0)
+                if last_modified >= datetime.utcnow().replace(microsecond=0):
+                    # HTTP dates have one second resolution: a change later in the same second would be missed
+                    last_modified = None
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag) if weak else request.if_none_match.contains(etag)
+            else:
+                not_modified = bool(last_modified and request.if_modified_since
+                                    and last_modified <= request.if_modified_since.replace(tzinfo=None))
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(company_id, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=weak)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = "private, no-cache" # Clients may keep the response but must revalidate it
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_report(*entities):
+    """
+    Serves a company-scoped report from report_cache, keyed by (company_id, endpoint, normalized
+    query parameters, data versions of `entities` with their updated_at), and coalesces concurrent
+    identical misses so the report is computed once. The timestamps keep a company that reuses a
+    deleted company's id (SQLite), whose versions count from 1 again, from matching its entries. Only 200 JSON responses are cached; NDJSON streams always run.
+    Must be applied below company_access_required (and conditional_get, whose versions it reuses).
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(company_id, *args, **kwargs):
+            if not report_cache.enabled or wants_ndjson():
+                return fn(company_id, *args, **kwargs)
+            read_entities, versions = g.get("data_versions", (None, None))
+            if read_entities != entities:
+                versions = get_versions(db.session, company_id, entities)
+            params = tuple(sorted(request.args.items(multi=True)))
+            key = (company_id, request.endpoint, params, tuple(versions.get(entity, (0, None)) for entity in entities))
+
+            def compute():
+                response = make_response(fn(company_id, *args, **kwargs))
+                rendered = (response.get_data(), response.status_code, response.mimetype)
+                return rendered, (len(rendered[0]) if response.status_code == 200 else None)
+
+            body, status, mimetype = report_cache.get_or_compute(key, compute, before_wait=db.session.rollback)
+            return current_app.response_class(body, status=status, mimetype=mimetype)
+        return wrapper
+    return decorator
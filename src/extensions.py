@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from src.utils.cache import AccessCache, ReportCache
 
 db = SQLAlchemy()
-
+access_cache = AccessCache() # Authorization roles, see company_access_required / system_admin_required
+report_cache = ReportCache() # Rendered reports, see cached_report
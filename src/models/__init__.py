@@ -10,3 +10,8 @@ from .inventory_item import InventoryItem
 from .invoice import Invoice, InvoiceItem
 from .employee import Employee
 from .salary import Salary # Import Salary from its new file
+from .revoked_token import RevokedToken
+from .data_version import DataVersion
+from .daily_aggregate import DailyIncomeAgg, DailyExpenseAgg
+from .payroll_rollup import EmployeePayrollYear
+from .report_job import ReportJob
@@ -1,12 +1,13 @@
 from src.extensions import db
 from datetime import datetime
 from .enums import CompanyRoleEnum
-# Import User model for to_dict_with_user_details, handled carefully to avoid circular import issues if User imports CompanyUser
-# It's generally safer if the to_dict method in the association object doesn't try to fetch full related objects by default
-# or does so within the method scope.
 
 class CompanyUser(db.Model):
     __tablename__ = 'company_users' # Explicitly naming the table
+    # The primary key (user_id, company_id) serves a user's companies; this one serves a company's members
+    __table_args__ = (
+        db.Index('ix_company_users_company_user', 'company_id', 'user_id'),
+    )
 
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), primary_key=True)
@@ -27,13 +28,12 @@ class CompanyUser(db.Model):
         }
 
     def to_dict_with_user_details(self):
-        # This method is as hinted in company_bp.py. Be mindful of performance if used for lists.
-        from .user import User # Local import to avoid circular dependency at module level
-        user_details = User.query.get(self.user_id)
+        # Uses the `user` relationship: list endpoints load it in the same query (contains_eager), otherwise it is loaded on access
+        user_details = self.user
         return {
             "user_id": self.user_id,
             "username": user_details.username if user_details else None,
             "email": user_details.email if user_details else None,
             "company_id": self.company_id,
             "role_in_company": self.role_in_company.value if self.role_in_company else None
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,30 @@
+from src.extensions import db
+
+# Daily totals per (company, day, category), kept in step with the income and expenses tables by
+# src/utils/aggregates.py so that date-range totals read aggregate rows instead of raw records.
+# Uncategorized records are counted under category "".
+
+class DailyIncomeAgg(db.Model):
+    __tablename__ = "daily_income_agg"
+
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(100), primary_key=True, default="")
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyIncomeAgg company={self.company_id} {self.day} {self.category!r}: {self.total} ({self.count})>"
+
+
+class DailyExpenseAgg(db.Model):
+    __tablename__ = "daily_expense_agg"
+
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(100), primary_key=True, default="")
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyExpenseAgg company={self.company_id} {self.day} {self.category!r}: {self.total} ({self.count})>"
@@ -0,0 +1,22 @@
+from src.extensions import db
+from datetime import datetime
+
+class DataVersion(db.Model):
+    """Per-company, per-entity change counter, bumped in the same transaction as every write (see src/utils/data_versions.py)."""
+    __tablename__ = "data_versions"
+
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    entity = db.Column(db.String(32), primary_key=True) # e.g. "income", "expenses", "invoices"
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<DataVersion company={self.company_id} {self.entity} v{self.version}>"
+
+    def to_dict(self):
+        return {
+            "company_id": self.company_id,
+            "entity": self.entity,
+            "version": self.version,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -4,6 +4,10 @@ from .salary import Salary # Import the Salary model from its new file
 
 class Employee(db.Model):
     __tablename__ = "employees"
+    # Company-scoped listing, ordered by name
+    __table_args__ = (
+        db.Index('ix_employees_company_name', 'company_id', 'last_name', 'first_name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     first_name = db.Column(db.String(100), nullable=False)
@@ -29,6 +33,9 @@ class Employee(db.Model):
     # Relationship to User
     user = db.relationship("User", back_populates="employee_profile", uselist=False)
 
+    # Fields clients may request with ?fields= (the keys of to_dict)
+    API_FIELDS = ("id", "first_name", "last_name", "email", "phone_number", "position", "hire_date", "is_active", "created_at", "user_id", "company_id")
+
     def __repr__(self):
         return f"<Employee {self.id}: {self.first_name} {self.last_name} - {self.position}>"
 
@@ -3,6 +3,13 @@ from datetime import datetime
 
 class Expense(db.Model):
     __tablename__ = "expenses"
+    # Composite indexes for the company-scoped listing, filters and reports
+    __table_args__ = (
+        db.Index('ix_expenses_company_date', 'company_id', 'date_incurred'),
+        db.Index('ix_expenses_company_category_date', 'company_id', 'category', 'date_incurred'),
+        db.Index('ix_expenses_company_vendor_date', 'company_id', 'vendor', 'date_incurred'),
+        db.Index('ix_expenses_company_user_date', 'company_id', 'user_id', 'date_incurred'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     description = db.Column(db.Text, nullable=False)
@@ -20,6 +27,11 @@ class Expense(db.Model):
     recorder = db.relationship("User", back_populates="expense_records")
     company = db.relationship("Company", back_populates="expense_records")
 
+    # Fields clients may request with ?fields= (the keys of to_dict)
+    API_FIELDS = ("id", "description", "amount", "date_incurred", "category", "vendor", "notes", "created_at", "user_id", "company_id")
+    # Filters accepted by the list endpoint (see src/utils/filters.py)
+    API_FILTERS = {"date_incurred": "date", "amount": "number", "category": "string", "vendor": "string", "user_id": "int"}
+
     def __repr__(self):
         return f"<Expense {self.id}: {self.description} - {self.amount}>"
 
@@ -3,6 +3,12 @@ from datetime import datetime
 
 class Income(db.Model):
     __tablename__ = "income"
+    # Composite indexes for the company-scoped listing, filters and reports
+    __table_args__ = (
+        db.Index('ix_income_company_date', 'company_id', 'date_received'),
+        db.Index('ix_income_company_category_date', 'company_id', 'category', 'date_received'),
+        db.Index('ix_income_company_user_date', 'company_id', 'user_id', 'date_received'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     description = db.Column(db.Text, nullable=False)
@@ -19,6 +25,11 @@ class Income(db.Model):
     recorder = db.relationship("User", back_populates="income_records")
     company = db.relationship("Company", back_populates="income_records")
 
+    # Fields clients may request with ?fields= (the keys of to_dict)
+    API_FIELDS = ("id", "description", "amount", "date_received", "category", "notes", "created_at", "user_id", "company_id")
+    # Filters accepted by the list endpoint (see src/utils/filters.py)
+    API_FILTERS = {"date_received": "date", "amount": "number", "category": "string", "user_id": "int"}
+
     def __repr__(self):
         return f"<Income {self.id}: {self.description} - {self.amount}>"
 
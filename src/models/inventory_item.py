@@ -29,6 +29,9 @@ class InventoryItem(db.Model):
     invoice_lines = db.relationship('InvoiceItem', back_populates='inventory_item', lazy='dynamic') # Changed to lazy='dynamic' for consistency if you expect to filter/query these
 
 
+    # Fields clients may request with ?fields= (the keys of to_dict)
+    API_FIELDS = ("id", "name", "description", "sku", "purchase_price", "sale_price", "quantity_on_hand", "unit_of_measure", "created_at", "updated_at", "company_id")
+
     def __repr__(self):
         return f"<InventoryItem {self.id}: {self.name} (SKU: {self.sku}) - Qty: {self.quantity_on_hand}>"
 
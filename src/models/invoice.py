@@ -6,6 +6,11 @@ class Invoice(db.Model):
     # To ensure invoice_number is unique per company
     __table_args__ = (
         db.UniqueConstraint('company_id', 'invoice_number', name='uq_invoice_company_invoice_number'),
+        # Composite indexes for the company-scoped listing, filters and reports
+        db.Index('ix_invoices_company_issue_date', 'company_id', 'issue_date'),
+        db.Index('ix_invoices_company_status_issue_date', 'company_id', 'status', 'issue_date'),
+        db.Index('ix_invoices_company_customer_issue_date', 'company_id', 'customer_name', 'issue_date'),
+        db.Index('ix_invoices_company_user_issue_date', 'company_id', 'user_id', 'issue_date'),
     )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -29,14 +34,26 @@ class Invoice(db.Model):
     # Relationship to InvoiceItem
     items = db.relationship("InvoiceItem", backref="invoice", lazy="dynamic", cascade="all, delete-orphan")
 
+    # Fields clients may request with ?fields= (the keys of to_dict)
+    API_FIELDS = ("id", "invoice_number", "customer_name", "customer_email", "customer_address", "issue_date", "due_date", "total_amount", "status", "notes", "created_at", "user_id", "company_id", "items")
+    # Filters accepted by the list endpoint (see src/utils/filters.py)
+    API_FILTERS = {"issue_date": "date", "due_date": "date", "total_amount": "number", "status": "string", "customer_name": "string", "user_id": "int"}
+
     def __repr__(self):
         return f"<Invoice {self.invoice_number} - {self.customer_name} - Status: {self.status}>"
 
+    @staticmethod
+    def to_dicts(invoices):
+        """Serializes a batch of invoices, loading all of their line items with one query instead of one per invoice."""
+        items_by_invoice = load_invoice_items([invoice.id for invoice in invoices])
+        return [invoice.to_dict(items=items_by_invoice.get(invoice.id, [])) for invoice in invoices]
+
     def calculate_total(self):
         self.total_amount = sum(item.line_total for item in self.items)
         return self.total_amount
 
-    def to_dict(self):
+    def to_dict(self, items=None):
+        """`items`: the invoice's already loaded InvoiceItems; queried from the relationship if omitted."""
         return {
             "id": self.id,
             "invoice_number": self.invoice_number,
@@ -51,11 +68,15 @@ class Invoice(db.Model):
             "created_at": self.created_at.isoformat(),
             "user_id": self.user_id,
             "company_id": self.company_id,
-            "items": [item.to_dict() for item in self.items.all()] # Serialize items
+            "items": [item.to_dict() for item in (self.items.all() if items is None else items)] # Serialize items
         }
 
 class InvoiceItem(db.Model):
     __tablename__ = "invoice_items"
+    # Items are always loaded by invoice (Invoice.items, load_invoice_items)
+    __table_args__ = (
+        db.Index('ix_invoice_items_invoice_id', 'invoice_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     invoice_id = db.Column(db.Integer, db.ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False)
@@ -86,3 +107,12 @@ class InvoiceItem(db.Model):
             "unit_price": self.unit_price,
             "line_total": self.line_total
         }
+
+
+def load_invoice_items(invoice_ids):
+    """Returns {invoice_id: [InvoiceItem, ...]} for the given invoices, loaded with one IN (...) query."""
+    items_by_invoice = {}
+    if invoice_ids:
+        for item in InvoiceItem.query.filter(InvoiceItem.invoice_id.in_(invoice_ids)).order_by(InvoiceItem.invoice_id, InvoiceItem.id):
+            items_by_invoice.setdefault(item.invoice_id, []).append(item)
+    return items_by_invoice
@@ -0,0 +1,25 @@
+from src.extensions import db
+
+class EmployeePayrollYear(db.Model):
+    """Running payroll totals per employee and calendar year, kept in step with salaries by src/utils/aggregates.py."""
+    __tablename__ = "employee_payroll_years"
+
+    employee_id = db.Column(db.Integer, db.ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    gross_amount = db.Column(db.Float, nullable=False, default=0.0)
+    deductions = db.Column(db.Float, nullable=False, default=0.0)
+    net_amount = db.Column(db.Float, nullable=False, default=0.0)
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<EmployeePayrollYear employee={self.employee_id} {self.year}: {self.net_amount} ({self.payment_count})>"
+
+    def to_dict(self):
+        return {
+            "employee_id": self.employee_id,
+            "year": self.year,
+            "gross_amount": self.gross_amount,
+            "deductions": self.deductions,
+            "net_amount": self.net_amount,
+            "payment_count": self.payment_count
+        }
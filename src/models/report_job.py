@@ -0,0 +1,37 @@
+import json
+from src.extensions import db
+from datetime import datetime
+
+class ReportJob(db.Model):
+    __tablename__ = "report_jobs"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
+    report = db.Column(db.String(50), nullable=False) # e.g. sales_report, see reports_bp.REPORT_JOBS
+    params = db.Column(db.Text, nullable=False, default="{}") # JSON object of the report's query parameters
+    status = db.Column(db.String(20), nullable=False, default="queued") # queued, running, succeeded, failed
+    result = db.Column(db.Text) # The report's JSON response body
+    result_status = db.Column(db.Integer) # The report's HTTP status code
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    requested_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    def __repr__(self):
+        return f"<ReportJob {self.id}: {self.report} for Company {self.company_id} - {self.status}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "company_id": self.company_id,
+            "report": self.report,
+            "params": json.loads(self.params) if self.params else {},
+            "status": self.status,
+            "result_status": self.result_status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "requested_by_user_id": self.requested_by_user_id
+        }
@@ -0,0 +1,27 @@
+from src.extensions import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    __tablename__ = "revoked_tokens"
+    # Read by the incremental sync of the revocation index (src/utils/revocation.py)
+    __table_args__ = (
+        db.Index('ix_revoked_tokens_revoked_at', 'revoked_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(64), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime) # Token expiry; rows can be purged once this has passed
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "jti": self.jti,
+            "user_id": self.user_id,
+            "revoked_at": self.revoked_at.isoformat() if self.revoked_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -7,6 +7,10 @@ from datetime import datetime
 
 class Salary(db.Model):
     __tablename__ = "salaries"
+    # Per-employee listing and the payroll report's date range, reached through the company's employees
+    __table_args__ = (
+        db.Index('ix_salaries_employee_payment_date', 'employee_id', 'payment_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     employee_id = db.Column(db.Integer, db.ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
@@ -25,6 +29,9 @@ class Salary(db.Model):
     recorder = db.relationship("User", back_populates="salaries_recorded", foreign_keys=[recorded_by_user_id])
     # The 'employee' backref is created by the Employee.salaries relationship
 
+    # Fields clients may request with ?fields= (the keys of to_dict)
+    API_FIELDS = ("id", "employee_id", "payment_date", "gross_amount", "deductions", "net_amount", "payment_period_start", "payment_period_end", "notes", "created_at", "recorded_by_user_id")
+
     def __repr__(self):
         return f"<Salary {self.id} for Employee {self.employee_id} - Net: {self.net_amount} on {self.payment_date}>"
     
@@ -1,6 +1,6 @@
 from src.extensions import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils.passwords import password_hasher
 from .enums import RoleEnum # Import RoleEnum from the new enums.py
 
 class User(db.Model):
@@ -14,6 +14,9 @@ class User(db.Model):
     # `native_enum=False` is recommended for broader DB compatibility. Explicit length ensures varchar is wide enough.
     role = db.Column(db.Enum(RoleEnum, native_enum=False, length=50), nullable=False, default=RoleEnum.USER) # Removed name="role_enum"
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped whenever the user's system role or company memberships change; tokens carrying
+    # role claims with an older version are not trusted (see src/utils/role_claims.py)
+    membership_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # --- Relationships ---
     # Companies this user owns (one-to-many)
@@ -35,11 +38,15 @@ class User(db.Model):
     def __repr__(self):
         return f"<User {self.username}>"
 
+    # Hashing runs on the bounded password_hasher pool; both may raise PasswordHashingBusy
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
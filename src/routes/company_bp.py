@@ -1,19 +1,26 @@
-from flask import Blueprint, jsonify, request
-from src.extensions import db
+from flask import Blueprint, jsonify, request, g
+from src.extensions import db, access_cache, report_cache
 from src.models.company import Company
 from src.models.user import User
 from src.models.company_user import CompanyUser # This will now correctly import the model
 import sys # Import sys for stderr
-from src.models.enums import RoleEnum, CompanyRoleEnum # Import from the new enums.py
+from src.models.enums import CompanyRoleEnum # Import from the new enums.py
+from sqlalchemy import select, union
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
+from src.utils.pagination import list_response
+from src.utils import inventory_valuation
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.decorators.auth_decorators import system_admin_required # Import the decorator
+from src.decorators.auth_decorators import system_admin_required, company_access_required, ALL_COMPANY_ROLES, ADMIN_ROLES
 
 # The full '/api/companies' prefix is handled by the app.register_blueprint in main.py
 company_bp = Blueprint('company_bp', __name__) # No url_prefix here
 
 def _get_current_user():
     """Helper to get the current authenticated User object."""
+    access = g.get("company_access")
+    if access is not None:
+        return access.user # Already loaded by company_access_required
     user_id_str = get_jwt_identity()
     if not user_id_str:
         return None
@@ -23,30 +30,6 @@ def _get_current_user():
     except ValueError:
         return None
 
-def _check_permission(user, company, allowed_company_roles=None, allow_owner=False, allow_system_admin=False):
-    """
-    Helper function to check user permissions for a company.
-    - user: The User object making the request.
-    - company: The Company object being accessed.
-    - allowed_company_roles: A list of CompanyRoleEnum values that are permitted.
-    - allow_owner: Boolean, True if the company owner is permitted.
-    - allow_system_admin: Boolean, True if a SYSTEM_ADMIN is permitted.
-    """
-    if not user or not company:
-        return False
-
-    if allow_system_admin and user.role == RoleEnum.SYSTEM_ADMIN:
-        return True
-
-    if allow_owner and company.owner_id == user.id:
-        return True
-
-    if allowed_company_roles:
-        company_user_link = CompanyUser.query.filter_by(user_id=user.id, company_id=company.id).first()
-        if company_user_link and company_user_link.role_in_company in allowed_company_roles:
-            return True
-    return False
-
 
 @company_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -80,59 +63,33 @@ def get_companies():
     if not current_user:
         return jsonify({"message": "Invalid user token"}), 401
 
-    # Companies owned by the user
-    owned_companies = Company.query.filter_by(owner_id=current_user.id).all()
-    
-    # Companies where the user is a member (via CompanyUser)
-    member_company_ids = [cu.company_id for cu in CompanyUser.query.filter_by(user_id=current_user.id).all()]
-    member_companies = Company.query.filter(Company.id.in_(member_company_ids)).all()
-    
-    all_accessible_companies = list(set(owned_companies + member_companies)) # Use set to avoid duplicates
-    
+    # Companies owned by the user UNION companies where the user is a member (via CompanyUser), in one query
+    owned_company_ids = select(Company.id).where(Company.owner_id == current_user.id)
+    member_company_ids = select(CompanyUser.company_id).where(CompanyUser.user_id == current_user.id)
+    all_accessible_companies = Company.query.filter(Company.id.in_(union(owned_company_ids, member_company_ids))).order_by(Company.name, Company.id).all()
+
     return jsonify([company.to_dict() for company in all_accessible_companies]), 200
 
 @company_bp.route('/all-system', methods=['GET']) # Route relative to blueprint root (now '/')
 @system_admin_required # Ensures only system admins can access
 def get_all_companies_system():
     """Returns a list of all companies in the system. For System Admin use."""
-    companies = Company.query.order_by(Company.name).all()
-    return jsonify([company.to_dict() for company in companies]), 200
+    return list_response(Company.query, [Company.name, Company.id], Company.to_dict)
 
 
 
 
 @company_bp.route('/<int:company_id>', methods=['GET']) # Route relative to blueprint root (now '/')
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to access this company") # Owner, system_admin, or any member
 def get_company(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Invalid user token"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    # User can access if they are owner, system_admin, or any member of the company
-    is_member = CompanyUser.query.filter_by(user_id=current_user.id, company_id=company.id).first() is not None
-    
-    if not _check_permission(current_user, company, allow_owner=True, allow_system_admin=True) and not is_member:
-        return jsonify({"message": "Unauthorized to access this company"}), 403
-        
+    company = g.company_access.company
     return jsonify(company.to_dict_detailed() if hasattr(company, 'to_dict_detailed') else company.to_dict()), 200
 
 
 @company_bp.route('/<int:company_id>', methods=['PUT']) # Route relative to blueprint root (now '/')
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to update this company")
 def update_company(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Invalid user token"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN], 
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to update this company"}), 403
+    company = g.company_access.company
 
     data = request.get_json()
     if not data:
@@ -154,21 +111,17 @@ def update_company(company_id):
 
 
 @company_bp.route('/<int:company_id>', methods=['DELETE']) # Route relative to blueprint root (now '/')
-@jwt_required()
+@company_access_required(message="Unauthorized to delete this company") # Owner or system_admin only
 def delete_company(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Invalid user token"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company, allow_owner=True, allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to delete this company"}), 403
+    company = g.company_access.company
 
     try:
         # Consider what happens to related data (employees, invoices etc.) - cascade deletes or manual cleanup
         db.session.delete(company)
         db.session.commit()
+        access_cache.invalidate_company(company_id)
+        report_cache.invalidate_company(company_id)
+        inventory_valuation.invalidate_company(company_id)
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -178,20 +131,8 @@ def delete_company(company_id):
 # --- Company User Management ---
 
 @company_bp.route('/<int:company_id>/users', methods=['POST']) # Route relative to blueprint root (now '/')
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to add users to this company")
 def add_user_to_company(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Invalid user token"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN], 
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to add users to this company"}), 403
-
     data = request.get_json()
     if not data or 'user_id' not in data or 'role_in_company' not in data:
         return jsonify({"message": "Missing user_id or role_in_company"}), 400
@@ -219,6 +160,7 @@ def add_user_to_company(company_id):
 
     try:
         db.session.commit()
+        access_cache.invalidate_membership(user_to_add.id, company_id)
         # Fetch the committed object to return its dict representation
         committed_link = CompanyUser.query.filter_by(user_id=user_to_add_id, company_id=company_id).first()
         return jsonify(committed_link.to_dict() if committed_link else {"message": "User added/updated in company"}), 200 if existing_link else 201
@@ -231,42 +173,18 @@ def add_user_to_company(company_id):
 
 
 @company_bp.route('/<int:company_id>/users', methods=['GET']) # Route relative to blueprint root (now '/')
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view users for this company") # Any member, owner or system admin
 def list_users_in_company(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Invalid user token"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    
-    # User must be a member of the company or a system admin to view members
-    is_member = CompanyUser.query.filter_by(user_id=current_user.id, company_id=company_id).first() is not None
-    is_owner = company.owner_id == current_user.id
-
-    if not (is_member or is_owner or current_user.role == RoleEnum.SYSTEM_ADMIN):
-        return jsonify({"message": "Unauthorized to view users for this company"}), 403
-
-    company_users = CompanyUser.query.filter_by(company_id=company_id).all()
-    return jsonify([cu.to_dict_with_user_details() if hasattr(cu, 'to_dict_with_user_details') else cu.to_dict() for cu in company_users]), 200
+    # Members and their user details come from one joined query per page
+    company_users = CompanyUser.query.join(CompanyUser.user).options(contains_eager(CompanyUser.user)).filter(CompanyUser.company_id == company_id)
+    return list_response(company_users, [CompanyUser.user_id], CompanyUser.to_dict_with_user_details)
 
 
 @company_bp.route('/<int:company_id>/users/<int:user_id_to_remove>', methods=['DELETE']) # Route relative to blueprint root (now '/')
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to remove users from this company")
 def remove_user_from_company(company_id, user_id_to_remove):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Invalid user token"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN], 
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to remove users from this company"}), 403
-
     # Prevent owner from being removed via this endpoint
-    if company.owner_id == user_id_to_remove:
+    if g.company_access.owner_id == user_id_to_remove:
         return jsonify({"message": "Company owner cannot be removed through this endpoint. Transfer ownership or delete company."}), 403
 
     company_user_link = CompanyUser.query.filter_by(user_id=user_id_to_remove, company_id=company_id).first()
@@ -276,6 +194,7 @@ def remove_user_from_company(company_id, user_id_to_remove):
     try:
         db.session.delete(company_user_link)
         db.session.commit()
+        access_cache.invalidate_membership(user_id_to_remove, company_id)
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -1,33 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from src.extensions import db
 from src.models.employee import Employee
 from src.models.salary import Salary # Import Salary from its new file
 from src.models.user import User
-from src.models.company import Company
-from src.models.enums import CompanyRoleEnum, RoleEnum
+from src.models.enums import RoleEnum
 from datetime import datetime, date
 from sqlalchemy.exc import IntegrityError
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.routes.company_bp import _get_current_user, _check_permission # Re-use helper functions
+from src.utils.pagination import list_response
+from src.utils.serializers import serializer_for
+from src.utils.fields import requested_fields, fetch_fields
+from src.utils.aggregates import payroll_year_totals
+from src.utils.group_commit import group_commit, GroupCommitBusy
+from src.decorators.auth_decorators import company_access_required, ALL_COMPANY_ROLES, EDITOR_ROLES, ADMIN_ROLES
+from src.decorators.cache_decorators import conditional_get
+from src.utils.data_versions import EMPLOYEES, SALARIES
 
 employee_bp = Blueprint("employee_bp", __name__)
 
 # --- Employee Endpoints ---
 @employee_bp.route("/employees", methods=["POST"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to add employees to this company")
 def add_employee(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to add employees to this company"}), 403
-
     data = request.get_json()
     if not data or not data.get("first_name") or not data.get("last_name"):
         return jsonify({"message": "Missing required fields (first_name, last_name)"}), 400
@@ -67,52 +60,43 @@ def add_employee(company_id):
 
 
 @employee_bp.route("/employees", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view employees for this company")
+@conditional_get(EMPLOYEES)
 def get_all_employees(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view employees for this company"}), 403
-
-    employees = Employee.query.filter_by(company_id=company_id).order_by(Employee.last_name, Employee.first_name).all()
-    return jsonify([employee.to_dict() for employee in employees]), 200
+    return list_response(Employee.query.filter_by(company_id=company_id), [Employee.last_name, Employee.first_name, Employee.id], serializer_for(Employee),
+                         model=Employee, fields=requested_fields(Employee))
 
 @employee_bp.route("/employees/<int:employee_id>", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view this employee")
 def get_employee(company_id, employee_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
+    fields = requested_fields(Employee)
+    if fields:
+        record = fetch_fields(Employee.query.filter_by(id=employee_id, company_id=company_id), Employee, fields)
+        if record is None:
+            return jsonify({"message": "Employee not found in this company"}), 404
+        return jsonify(record), 200
 
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     employee = Employee.query.get_or_404(employee_id)
 
     if employee.company_id != company_id:
         return jsonify({"message": "Employee not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view this employee"}), 403
-
-    return jsonify(employee.to_dict()), 200
+    # Year-to-date payroll: one row of the employee_payroll_years rollup
+    year = date.today().year
+    ytd = payroll_year_totals(employee.id, year)
+    response = employee.to_dict()
+    response["ytd"] = {
+        "year": year,
+        "gross_amount": ytd.gross_amount if ytd else 0.0,
+        "deductions": ytd.deductions if ytd else 0.0,
+        "net_amount": ytd.net_amount if ytd else 0.0,
+        "payment_count": ytd.payment_count if ytd else 0,
+    }
+    return jsonify(response), 200
 
 @employee_bp.route("/employees/<int:employee_id>", methods=["PUT"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to update employees in this company")
 def update_employee(company_id, employee_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     employee = Employee.query.get_or_404(employee_id)
     data = request.get_json()
     if not data:
@@ -124,12 +108,6 @@ def update_employee(company_id, employee_id):
     if employee.company_id != company_id:
         return jsonify({"message": "Employee not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to update employees in this company"}), 403
-
     if 'email' in data and data['email'] != employee.email:
         # Ensure email is not None or empty if it's being set and is required to be non-null unique
         # For now, assuming unique constraint handles empty strings if not nullable.
@@ -163,23 +141,13 @@ def update_employee(company_id, employee_id):
         return jsonify({"message": "Database error during update. Email might conflict."}), 409
 
 @employee_bp.route("/employees/<int:employee_id>", methods=["DELETE"])
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to delete employees from this company")
 def delete_employee(company_id, employee_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     employee = Employee.query.get_or_404(employee_id)
 
     if employee.company_id != company_id:
         return jsonify({"message": "Employee not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to delete employees from this company"}), 403
     # Salaries associated will be deleted due to cascade in model
     db.session.delete(employee)
     db.session.commit()
@@ -187,21 +155,13 @@ def delete_employee(company_id, employee_id):
 
 # --- Endpoint to convert Employee to User ---
 @employee_bp.route("/employees/<int:employee_id>/create-user", methods=["POST"])
-@jwt_required() # Typically an admin action
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to create user for employee in this company") # Typically an admin action
 def create_user_for_employee(company_id, employee_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
     employee = Employee.query.get_or_404(employee_id)
 
     if employee.company_id != company_id:
         return jsonify({"message": "Employee not found in this company"}), 404
 
-    if not _check_permission(current_user, company, allowed_company_roles=[CompanyRoleEnum.ADMIN], allow_owner=True, allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to create user for employee in this company"}), 403
-        
     if employee.user_id:
         return jsonify({"message": f"Employee {employee_id} already has an associated user account (User ID: {employee.user_id})."}), 409
 
@@ -248,13 +208,8 @@ def create_user_for_employee(company_id, employee_id):
 
 # --- Salary Endpoints ---
 @employee_bp.route("/employees/<int:employee_id>/salaries", methods=["POST"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to add salaries for this company's employees")
 def add_salary(company_id, employee_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
     employee = Employee.query.get_or_404(employee_id)
 
     data = request.get_json()
@@ -280,13 +235,7 @@ def add_salary(company_id, employee_id):
     if employee.company_id != company_id:
         return jsonify({"message": "Employee not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to add salaries for this company's employees"}), 403
-
-    recorder_id = current_user.id
+    recorder_id = g.company_access.user_id
     new_salary = Salary(
         employee_id=employee.id,
         payment_date=payment_date,
@@ -300,66 +249,49 @@ def add_salary(company_id, employee_id):
     new_salary.calculate_net_amount() # Calculate net amount before saving
     
     try:
-        db.session.add(new_salary)
-        db.session.commit()
-        return jsonify(new_salary.to_dict()), 201
+        return jsonify(group_commit.insert(new_salary)), 201
+    except GroupCommitBusy:
+        raise # Answered with 503 by the app's error handler
     except Exception as e: # Catch a broader exception if needed, or specific ones
         db.session.rollback()
         return jsonify({"message": "Failed to add salary record", "error": str(e)}), 500
 
 @employee_bp.route("/employees/<int:employee_id>/salaries", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view salaries for this company's employees")
+@conditional_get(EMPLOYEES, SALARIES)
 def get_employee_salaries(company_id, employee_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
     employee = Employee.query.get_or_404(employee_id)
 
     if employee.company_id != company_id:
         return jsonify({"message": "Employee not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view salaries for this company's employees"}), 403
-
-    salaries = Salary.query.filter_by(employee_id=employee_id).order_by(Salary.payment_date.desc()).all()
-    return jsonify([salary.to_dict() for salary in salaries]), 200
+    return list_response(Salary.query.filter_by(employee_id=employee_id), [Salary.payment_date, Salary.id], serializer_for(Salary), descending=True,
+                         model=Salary, fields=requested_fields(Salary))
 
 # Note: The individual salary GET, PUT, DELETE routes are now nested under company and employee
 # as per the api.http file structure: /api/companies/<cid>/employees/<eid>/salaries/<sid>
 
 @employee_bp.route("/employees/<int:employee_id>/salaries/<int:salary_id>", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view this salary record")
 def get_salary(company_id, employee_id, salary_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
+    fields = requested_fields(Salary)
+    if fields:
+        record = fetch_fields(Salary.query.join(Employee, Salary.employee_id == Employee.id).filter(Salary.id == salary_id, Salary.employee_id == employee_id, Employee.company_id == company_id), Salary, fields)
+        if record is None:
+            return jsonify({"message": "Salary record not found for this employee in this company"}), 404
+        return jsonify(record), 200
 
-    company = Company.query.get_or_404(company_id)
     employee = Employee.query.get_or_404(employee_id)
     salary = Salary.query.get_or_404(salary_id)
 
     if employee.company_id != company_id or salary.employee_id != employee_id:
         return jsonify({"message": "Salary record not found for this employee in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view this salary record"}), 403
-
     return jsonify(salary.to_dict()), 200
 
 @employee_bp.route("/employees/<int:employee_id>/salaries/<int:salary_id>", methods=["PUT"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to update this salary record")
 def update_salary(company_id, employee_id, salary_id):
-    current_user = _get_current_user()
-    if not current_user: return jsonify({"message": "Authentication required"}), 401
-    company = Company.query.get_or_404(company_id)
     employee = Employee.query.get_or_404(employee_id)
     salary = Salary.query.get_or_404(salary_id)
     data = request.get_json()
@@ -398,12 +330,6 @@ def update_salary(company_id, employee_id, salary_id):
     if employee.company_id != company_id or salary.employee_id != employee_id:
         return jsonify({"message": "Salary record not found for this employee in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to update this salary record"}), 403
-
     if updated:
         salary.calculate_net_amount()
         try:
@@ -415,24 +341,14 @@ def update_salary(company_id, employee_id, salary_id):
     return jsonify(salary.to_dict()), 200
 
 @employee_bp.route("/employees/<int:employee_id>/salaries/<int:salary_id>", methods=["DELETE"])
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to delete this salary record")
 def delete_salary(company_id, employee_id, salary_id):
-    current_user = _get_current_user()
-    if not current_user: return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
     employee = Employee.query.get_or_404(employee_id)
     salary = Salary.query.get_or_404(salary_id)
 
     if employee.company_id != company_id or salary.employee_id != employee_id:
         return jsonify({"message": "Salary record not found for this employee in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to delete this salary record"}), 403
-
     db.session.delete(salary)
     db.session.commit()
     return '', 204
@@ -1,32 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from src.extensions import db
 from src.models.expense import Expense # Changed from Income to Expense
-from src.models.company import Company
-from src.models.user import User # Though _get_current_user returns User object
-from src.models.enums import CompanyRoleEnum, RoleEnum
 from datetime import datetime
-from flask_jwt_extended import jwt_required # get_jwt_identity is in _get_current_user
 from sqlalchemy.exc import IntegrityError
-from src.routes.company_bp import _get_current_user, _check_permission # Re-use helper functions
+from src.utils.pagination import list_response
+from src.utils.serializers import serializer_for
+from src.utils.fields import requested_fields, fetch_fields
+from src.utils.filters import apply_filters
+from src.utils.group_commit import group_commit, GroupCommitBusy
+from src.decorators.auth_decorators import company_access_required, ALL_COMPANY_ROLES, EDITOR_ROLES, ADMIN_ROLES
+from src.decorators.cache_decorators import conditional_get
+from src.utils.data_versions import EXPENSES
 
 
 expense_bp = Blueprint("expense_bp", __name__)
 
 @expense_bp.route("/expenses", methods=["POST"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to add expenses to this company")
 def add_expense_record(company_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to add expenses to this company"}), 403
-
     data = request.get_json()
     if not data or not data.get("description") or data.get("amount") is None or not data.get("date_incurred"):
         return jsonify({"message": "Missing required fields (description, amount, date_incurred)"}), 400
@@ -46,13 +37,13 @@ def add_expense_record(company_id): # Renamed function and added company_id
         category=data.get("category"),
         vendor=data.get("vendor"),
         notes=data.get("notes"),
-        user_id=current_user.id, # User who recorded this expense
+        user_id=g.company_access.user_id, # User who recorded this expense
         company_id=company_id # Assign to the current company
     )
     try:
-        db.session.add(new_expense)
-        db.session.commit()
-        return jsonify(new_expense.to_dict()), 201
+        return jsonify(group_commit.insert(new_expense)), 201
+    except GroupCommitBusy:
+        raise # Answered with 503 by the app's error handler
     except IntegrityError:
         db.session.rollback()
         return jsonify({"message": "Database error: Could not add expense record."}), 500
@@ -62,52 +53,32 @@ def add_expense_record(company_id): # Renamed function and added company_id
 
 
 @expense_bp.route("/expenses", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view expenses for this company")
+@conditional_get(EXPENSES)
 def get_all_expense_records(company_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view expenses for this company"}), 403
-
-    expenses = Expense.query.filter_by(company_id=company_id).order_by(Expense.date_incurred.desc()).all()
-    return jsonify([expense.to_dict() for expense in expenses]), 200
+    return list_response(apply_filters(Expense.query.filter_by(company_id=company_id), Expense), [Expense.date_incurred, Expense.id], serializer_for(Expense), descending=True,
+                         model=Expense, fields=requested_fields(Expense))
 
 @expense_bp.route("/expenses/<int:expense_id>", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view this expense record")
 def get_expense_record(company_id, expense_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
+    fields = requested_fields(Expense)
+    if fields:
+        record = fetch_fields(Expense.query.filter_by(id=expense_id, company_id=company_id), Expense, fields)
+        if record is None:
+            return jsonify({"message": "Expense record not found in this company"}), 404
+        return jsonify(record), 200
 
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     expense = Expense.query.get_or_404(expense_id)
 
     if expense.company_id != company_id:
         return jsonify({"message": "Expense record not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view this expense record"}), 403
-
     return jsonify(expense.to_dict()), 200
 
 @expense_bp.route("/expenses/<int:expense_id>", methods=["PUT"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to update expenses in this company")
 def update_expense_record(company_id, expense_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     expense = Expense.query.get_or_404(expense_id)
     data = request.get_json()
     updated = False # Flag to check if any actual update happened
@@ -143,12 +114,6 @@ def update_expense_record(company_id, expense_id): # Renamed function and added
     if expense.company_id != company_id:
         return jsonify({"message": "Expense record not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to update expenses in this company"}), 403
-
     if updated:
         try:
             db.session.commit()
@@ -161,23 +126,13 @@ def update_expense_record(company_id, expense_id): # Renamed function and added
     return jsonify(expense.to_dict()), 200
 
 @expense_bp.route("/expenses/<int:expense_id>", methods=["DELETE"])
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to delete expenses from this company")
 def delete_expense_record(company_id, expense_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     expense = Expense.query.get_or_404(expense_id)
 
     if expense.company_id != company_id:
         return jsonify({"message": "Expense record not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN], # Typically only admins or owners can delete
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to delete expenses from this company"}), 403
     try:
         db.session.delete(expense)
         db.session.commit()
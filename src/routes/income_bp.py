@@ -1,32 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from src.extensions import db
 from src.models.income import Income
-from src.models.company import Company
-from src.models.user import User # Though _get_current_user returns User object
-from src.models.enums import CompanyRoleEnum, RoleEnum
 from datetime import datetime
-from flask_jwt_extended import jwt_required # get_jwt_identity is in _get_current_user
 from sqlalchemy.exc import IntegrityError
-from src.routes.company_bp import _get_current_user, _check_permission # Re-use helper functions
+from src.utils.pagination import list_response
+from src.utils.serializers import serializer_for
+from src.utils.fields import requested_fields, fetch_fields
+from src.utils.filters import apply_filters
+from src.utils.group_commit import group_commit, GroupCommitBusy
+from src.decorators.auth_decorators import company_access_required, ALL_COMPANY_ROLES, EDITOR_ROLES, ADMIN_ROLES
+from src.decorators.cache_decorators import conditional_get
+from src.utils.data_versions import INCOME
 
 
 income_bp = Blueprint("income_bp", __name__)
 
 @income_bp.route("/income", methods=["POST"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to add income to this company")
 def add_income_record(company_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to add income to this company"}), 403
-
     data = request.get_json()
     if not data or not data.get("description") or data.get("amount") is None or not data.get("date_received"):
         return jsonify({"message": "Missing required fields (description, amount, date_received)"}), 400
@@ -45,13 +36,13 @@ def add_income_record(company_id): # Renamed function and added company_id
         date_received=date_received,
         category=data.get("category"),
         notes=data.get("notes"),
-        user_id=current_user.id, # User who recorded this income
+        user_id=g.company_access.user_id, # User who recorded this income
         company_id=company_id # Assign to the current company
     )
     try:
-        db.session.add(new_income)
-        db.session.commit()
-        return jsonify(new_income.to_dict()), 201
+        return jsonify(group_commit.insert(new_income)), 201
+    except GroupCommitBusy:
+        raise # Answered with 503 by the app's error handler
     except IntegrityError:
         db.session.rollback()
         return jsonify({"message": "Database error: Could not add income record."}), 500
@@ -60,52 +51,32 @@ def add_income_record(company_id): # Renamed function and added company_id
         return jsonify({"message": "An unexpected error occurred.", "error": str(e)}), 500
 
 @income_bp.route("/income", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view income for this company")
+@conditional_get(INCOME)
 def get_all_income_records(company_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view income for this company"}), 403
-
-    incomes = Income.query.filter_by(company_id=company_id).order_by(Income.date_received.desc()).all()
-    return jsonify([income.to_dict() for income in incomes]), 200
+    return list_response(apply_filters(Income.query.filter_by(company_id=company_id), Income), [Income.date_received, Income.id], serializer_for(Income), descending=True,
+                         model=Income, fields=requested_fields(Income))
 
 @income_bp.route("/income/<int:income_id>", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view this income record")
 def get_income_record(company_id, income_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
+    fields = requested_fields(Income)
+    if fields:
+        record = fetch_fields(Income.query.filter_by(id=income_id, company_id=company_id), Income, fields)
+        if record is None:
+            return jsonify({"message": "Income record not found in this company"}), 404
+        return jsonify(record), 200
 
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     income = Income.query.get_or_404(income_id)
 
     if income.company_id != company_id:
         return jsonify({"message": "Income record not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view this income record"}), 403
-
     return jsonify(income.to_dict()), 200
 
 @income_bp.route("/income/<int:income_id>", methods=["PUT"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to update income in this company")
 def update_income_record(company_id, income_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     income = Income.query.get_or_404(income_id)
     data = request.get_json()
     updated = False # Flag to check if any actual update happened
@@ -138,12 +109,6 @@ def update_income_record(company_id, income_id): # Renamed function and added co
     if income.company_id != company_id:
         return jsonify({"message": "Income record not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to update income in this company"}), 403
-
     if updated:
         try:
             db.session.commit()
@@ -156,23 +121,13 @@ def update_income_record(company_id, income_id): # Renamed function and added co
     return jsonify(income.to_dict()), 200
 
 @income_bp.route("/income/<int:income_id>", methods=["DELETE"])
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to delete income from this company")
 def delete_income_record(company_id, income_id): # Renamed function and added company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     income = Income.query.get_or_404(income_id)
 
     if income.company_id != company_id:
         return jsonify({"message": "Income record not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN], # Typically only admins or owners can delete
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to delete income from this company"}), 403
     try:
         db.session.delete(income)
         db.session.commit()
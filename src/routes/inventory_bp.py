@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify
 from src.extensions import db
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.inventory_item import InventoryItem
-from src.models.company import Company
-from src.models.user import User
-from src.models.enums import CompanyRoleEnum, RoleEnum
-from src.routes.company_bp import _get_current_user, _check_permission # Re-use helper functions
+from src.utils.pagination import list_response
+from src.utils.serializers import serializer_for
+from src.utils.fields import requested_fields, fetch_fields
+from src.decorators.auth_decorators import company_access_required, ALL_COMPANY_ROLES, EDITOR_ROLES, ADMIN_ROLES
+from src.decorators.cache_decorators import conditional_get
+from src.utils.data_versions import INVENTORY
 
 
 inventory_bp = Blueprint("inventory_bp", __name__)
@@ -28,20 +29,9 @@ def add_sample_products_if_empty(company_id_for_samples):
 # or via a CLI command, not directly within a GET route.
 
 @inventory_bp.route("/inventory", methods=["POST"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to add inventory to this company")
 def add_inventory_item(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    
     # Check if user has permission to add inventory (e.g., owner, admin, editor)
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR], 
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to add inventory to this company"}), 403
 
     data = request.get_json()
     if not data or not data.get("name") or data.get("sale_price") is None:
@@ -85,71 +75,46 @@ def add_inventory_item(company_id):
         return jsonify({"message": "Failed to add inventory item", "error": str(e)}), 500
 
 @inventory_bp.route("/inventory", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view inventory for this company")
+@conditional_get(INVENTORY)
 def get_all_inventory_items(company_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
     # Check if user has permission to view inventory (e.g., owner, any member role, system admin)
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER], 
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view inventory for this company"}), 403
 
     # Consider removing add_sample_products_if_empty() from here.
     # It's better to handle sample data during app setup or via a separate script.
     # If you keep it for demo purposes, be aware of its side effects on a GET request.
     # add_sample_products_if_empty(company_id) # If you decide to keep it for a specific company
 
-    items = InventoryItem.query.filter_by(company_id=company_id).all()
-    return jsonify([item.to_dict() for item in items]), 200
+    return list_response(InventoryItem.query.filter_by(company_id=company_id), [InventoryItem.name, InventoryItem.id], serializer_for(InventoryItem),
+                         model=InventoryItem, fields=requested_fields(InventoryItem))
 
 
 @inventory_bp.route("/inventory/<int:item_id>", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view this inventory item")
 def get_inventory_item(company_id, item_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
+    fields = requested_fields(InventoryItem)
+    if fields:
+        record = fetch_fields(InventoryItem.query.filter_by(id=item_id, company_id=company_id), InventoryItem, fields)
+        if record is None:
+            return jsonify({"message": "Inventory item not found in this company"}), 404
+        return jsonify(record), 200
 
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     item = InventoryItem.query.get_or_404(item_id)
 
     if item.company_id != company_id: # Ensure item belongs to the specified company
         return jsonify({"message": "Inventory item not found in this company"}), 404
 
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER], 
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view this inventory item"}), 403
-
     return jsonify(item.to_dict()), 200
 
 @inventory_bp.route("/inventory/<int:item_id>", methods=["PUT"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to update inventory in this company")
 def update_inventory_item(company_id, item_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     item = InventoryItem.query.get_or_404(item_id)
     data = request.get_json()
 
     if item.company_id != company_id:
         return jsonify({"message": "Inventory item not found in this company"}), 404
 
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR], 
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to update inventory in this company"}), 403
-
     if data.get("name"):
         # Check if new name already exists for another item
         existing_item_with_name = InventoryItem.query.filter(InventoryItem.company_id == company_id, InventoryItem.id != item_id, InventoryItem.name == data["name"]).first()
@@ -201,23 +166,13 @@ def update_inventory_item(company_id, item_id):
         return jsonify({"message": "Failed to update inventory item", "error": str(e)}), 500
 
 @inventory_bp.route("/inventory/<int:item_id>", methods=["DELETE"])
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to delete inventory from this company")
 def delete_inventory_item(company_id, item_id):
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     item = InventoryItem.query.get_or_404(item_id)
 
     if item.company_id != company_id:
         return jsonify({"message": "Inventory item not found in this company"}), 404
 
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN], # Typically only admins or owners can delete
-                             allow_owner=True, 
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to delete inventory from this company"}), 403
     try:
         db.session.delete(item)
         db.session.commit()
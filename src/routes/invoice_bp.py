@@ -1,14 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from src.extensions import db
-from src.models.invoice import Invoice, InvoiceItem
+from src.models.invoice import Invoice, InvoiceItem, load_invoice_items
 from src.models.inventory_item import InventoryItem as Product # Alias for clarity
-from src.models.company import Company
-from src.models.user import User # Though _get_current_user returns User object
-from src.models.enums import CompanyRoleEnum, RoleEnum
 from datetime import datetime, date
-from flask_jwt_extended import jwt_required # get_jwt_identity is in _get_current_user
 import shortuuid # For generating unique invoice numbers
-from src.routes.company_bp import _get_current_user, _check_permission # Re-use helper functions
+from src.utils.pagination import list_response
+from src.utils.serializers import serializer_for
+from src.utils.fields import requested_fields, fetch_fields
+from src.utils.filters import apply_filters
+from src.decorators.auth_decorators import company_access_required, ALL_COMPANY_ROLES, EDITOR_ROLES, ADMIN_ROLES
+from src.decorators.cache_decorators import conditional_get
+from src.utils.data_versions import INVOICES
 
 invoice_bp = Blueprint("invoice_bp", __name__)
 
@@ -21,21 +23,16 @@ def generate_invoice_number(company_id_for_uniqueness):
         if not Invoice.query.filter_by(company_id=company_id_for_uniqueness, invoice_number=num).first():
             return num
 
+def _attach_items(rows, dicts):
+    """Adds the line items of a batch of invoice rows, loaded with one IN (...) query."""
+    items_by_invoice = load_invoice_items([row.id for row in rows])
+    serialize_item = serializer_for(InvoiceItem)
+    for row, record in zip(rows, dicts):
+        record["items"] = serialize_item.many(items_by_invoice.get(row.id, []))
+
 @invoice_bp.route("/invoices", methods=["POST"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to create invoices for this company")
 def create_invoice(company_id): # Add company_id from URL
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to create invoices for this company"}), 403
-
     data = request.get_json()
     if not data or not data.get("customer_name") or not data.get("items"):
         return jsonify({"message": "Missing required fields (customer_name, items)"}), 400
@@ -62,7 +59,7 @@ def create_invoice(company_id): # Add company_id from URL
         due_date=due_date,
         status=data.get("status", "Draft"),
         notes=data.get("notes"),
-        user_id=current_user.id, # User who created the invoice
+        user_id=g.company_access.user_id, # User who created the invoice
         company_id=company_id # Assign to the current company
     )
     db.session.add(new_invoice)
@@ -120,64 +117,43 @@ def create_invoice(company_id): # Add company_id from URL
     return jsonify(new_invoice.to_dict()), 201
 
 @invoice_bp.route("/invoices", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view invoices for this company")
+@conditional_get(INVOICES)
 def get_all_invoices(company_id): # Add company_id from URL
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view invoices for this company"}), 403
-
-    invoices = Invoice.query.filter_by(company_id=company_id).order_by(Invoice.issue_date.desc()).all()
-    return jsonify([invoice.to_dict() for invoice in invoices]), 200
+    fields = requested_fields(Invoice)
+    # Line items are attached per page / streamed batch with one query, not loaded per invoice
+    return list_response(apply_filters(Invoice.query.filter_by(company_id=company_id), Invoice), [Invoice.issue_date, Invoice.id],
+                         serializer_for(Invoice), descending=True,
+                         model=Invoice, fields=fields, attach=_attach_items if not fields or "items" in fields else None)
 
 
 @invoice_bp.route("/invoices/<int:invoice_id>", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view this invoice")
 def get_invoice(company_id, invoice_id): # Add company_id from URL
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
+    fields = requested_fields(Invoice)
+    if fields:
+        record = fetch_fields(Invoice.query.filter_by(id=invoice_id, company_id=company_id), Invoice, fields)
+        if record is None:
+            return jsonify({"message": "Invoice not found in this company"}), 404
+        if "items" in fields:
+            record["items"] = [item.to_dict() for item in InvoiceItem.query.filter_by(invoice_id=invoice_id).order_by(InvoiceItem.id)]
+        return jsonify(record), 200
 
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     invoice = Invoice.query.get_or_404(invoice_id)
 
     if invoice.company_id != company_id:
         return jsonify({"message": "Invoice not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view this invoice"}), 403
-
     return jsonify(invoice.to_dict()), 200
 
 @invoice_bp.route("/invoices/<int:invoice_id>", methods=["PUT"])
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to update this invoice")
 def update_invoice(company_id, invoice_id): # Add company_id from URL
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     invoice = Invoice.query.get_or_404(invoice_id)
 
     if invoice.company_id != company_id:
         return jsonify({"message": "Invoice not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR],
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to update this invoice"}), 403
-
     data = request.get_json()
     if not data:
         return jsonify({"message": "Request body must be JSON"}), 400
@@ -250,24 +226,13 @@ def update_invoice(company_id, invoice_id): # Add company_id from URL
     return jsonify(invoice.to_dict()), 200
 
 @invoice_bp.route("/invoices/<int:invoice_id>", methods=["DELETE"])
-@jwt_required()
+@company_access_required(roles=ADMIN_ROLES, message="Unauthorized to delete this invoice")
 def delete_invoice(company_id, invoice_id): # Add company_id from URL
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id) # Ensure company exists
     invoice = Invoice.query.get_or_404(invoice_id)
 
     if invoice.company_id != company_id:
         return jsonify({"message": "Invoice not found in this company"}), 404
 
-    if not _check_permission(current_user, company,
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN], # Typically only ADMIN or owner can delete
-                             allow_owner=True,
-                             allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to delete this invoice"}), 403
-
     # The InvoiceItem records will be deleted due to cascade="all, delete-orphan" on Invoice.items
     db.session.delete(invoice) 
     db.session.commit() 
@@ -1,19 +1,27 @@
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, jsonify, request, g, url_for, current_app
+from sqlalchemy import func
 from src.extensions import db
-from datetime import datetime
-from flask_jwt_extended import jwt_required # get_jwt_identity is in _get_current_user
+from datetime import date, datetime
 
 # Import your models here to fetch data for reports
-from src.models.income import Income
 from src.models.expense import Expense
 from src.models.invoice import Invoice 
 from src.models.inventory_item import InventoryItem
 from src.models.employee import Employee
 from src.models.salary import Salary # Import Salary from its new file
-from src.models.company import Company # Import Company model
-from src.models.user import User # Though _get_current_user returns User object
-from src.models.enums import CompanyRoleEnum, RoleEnum # Import for permissions
-from src.routes.company_bp import _get_current_user, _check_permission # Re-use helper functions
+from src.models.report_job import ReportJob
+from src.utils.streaming import wants_ndjson, iter_query, iter_batches, ndjson_response
+from src.utils.pagination import keyset_page
+from src.utils.serializers import serializer_for
+from src.utils.aggregates import range_total, period_series, payroll_by_employee
+from src.utils.periods import GRANULARITIES
+from src.utils.report_jobs import report_job_runner, QUEUED, RUNNING
+from src.utils.inventory_valuation import VALUATION_GROUPS, valuation_summary, valuation_details_query
+from src.models.daily_aggregate import DailyIncomeAgg, DailyExpenseAgg
+from src.decorators.auth_decorators import company_access_required, ALL_COMPANY_ROLES, EDITOR_ROLES
+from src.decorators.cache_decorators import conditional_get, cached_report
+from src.utils.data_versions import INCOME, EXPENSES, INVOICES, INVENTORY, EMPLOYEES, SALARIES
 
 # It's common to define the blueprint with its own segment of the URL.
 # Since it's registered with /api in main.py, and these are report routes,
@@ -21,20 +29,26 @@ from src.routes.company_bp import _get_current_user, _check_permission # Re-use
 # The url_prefix is now handled in main.py for company scoping
 reports_bp = Blueprint("reports_bp", __name__)
 
+# Number of groups returned per breakdown, largest totals first
+BREAKDOWN_LIMIT = 100
+
+
+def _include_details():
+    """Detail sections are included (one keyset page at a time) unless ?include_details=false."""
+    return request.args.get('include_details', 'true').lower() not in ('0', 'false', 'no')
+
+
+def _breakdown(query, *names):
+    """Runs a grouped (key..., total, count) query and returns its rows as dicts keyed by `names`."""
+    return [dict(zip(names, row)) for row in query.limit(BREAKDOWN_LIMIT).all()]
+
+
 # Routes will be relative to /api/companies/<company_id>
 @reports_bp.route("/reports/profit_and_loss", methods=["GET"])
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view reports for this company")
+@conditional_get(INCOME, EXPENSES)
+@cached_report(INCOME, EXPENSES)
 def get_profit_and_loss_report(company_id): # Add company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER], 
-                             allow_owner=True, allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view reports for this company"}), 403
-
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
@@ -50,23 +64,24 @@ def get_profit_and_loss_report(company_id): # Add company_id
     if start_date > end_date:
         return jsonify({"message": "Start date cannot be after end date."}), 400
 
-    total_income = db.session.query(db.func.sum(Income.amount)).filter(
-        Income.company_id == company_id, # Filter by company
-        Income.date_received >= start_date,
-        Income.date_received <= end_date
-        # Income.user_id == current_user.id # Decide if user-specific filtering is still needed
-    ).scalar() or 0.0
-
-    total_expenses = db.session.query(db.func.sum(Expense.amount)).filter(
-        Expense.company_id == company_id, # Filter by company
-        Expense.date_incurred >= start_date,
-        Expense.date_incurred <= end_date
-        # Expense.user_id == current_user.id # Decide if user-specific filtering is still needed
-    ).scalar() or 0.0
+    # Optional time series: ?granularity=day|week|month|quarter|year
+    granularity = request.args.get('granularity')
+    if granularity and granularity not in GRANULARITIES:
+        return jsonify({"message": f"Invalid granularity. Supported values are: {', '.join(GRANULARITIES)}."}), 400
+
+    if granularity:
+        # One grouped query over both aggregates; totals are summed from the buckets
+        series = period_series(company_id, start_date, end_date, granularity)
+        total_income = sum(bucket["income"] for bucket in series)
+        total_expenses = sum(bucket["expenses"] for bucket in series)
+    else:
+        # Read from the daily aggregates: at most one row per day and category, whatever the number of records
+        total_income, _ = range_total(DailyIncomeAgg, company_id, start_date, end_date)
+        total_expenses, _ = range_total(DailyExpenseAgg, company_id, start_date, end_date)
 
     net_profit_loss = total_income - total_expenses
 
-    return jsonify({
+    report = {
         "report_name": "Profit and Loss",
         "company_id": company_id,
         "period_start": start_date.isoformat(),
@@ -74,21 +89,17 @@ def get_profit_and_loss_report(company_id): # Add company_id
         "total_income": total_income,
         "total_expenses": total_expenses,
         "net_profit_loss": net_profit_loss
-    }), 200
+    }
+    if granularity:
+        report["granularity"] = granularity
+        report["series"] = series
+    return jsonify(report), 200
 
 @reports_bp.route("/reports/sales_report", methods=["GET"]) # Path relative to blueprint
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view reports for this company")
+@conditional_get(INVOICES)
+@cached_report(INVOICES)
 def get_sales_report(company_id): # Add company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER], 
-                             allow_owner=True, allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view reports for this company"}), 403
-
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
@@ -104,40 +115,58 @@ def get_sales_report(company_id): # Add company_id
     if start_date > end_date:
         return jsonify({"message": "Start date cannot be after end date."}), 400
 
-    invoices_query = Invoice.query.filter(
+    conditions = (
         Invoice.company_id == company_id, # Filter by company
         Invoice.issue_date >= start_date,
         Invoice.issue_date <= end_date
         # Invoice.user_id == current_user.id # Decide if user-specific filtering is still needed
         # Consider filtering by Invoice.status (e.g., 'Paid', 'Sent')
-    ).order_by(Invoice.issue_date.asc()) # You might also want to filter by status (e.g., 'Paid', 'Sent')
-    
-    invoices = invoices_query.all()
-    total_sales_amount = sum(invoice.total_amount for invoice in invoices)
-    
-    return jsonify({
+    )
+    invoices_query = Invoice.query.filter(*conditions).order_by(Invoice.issue_date.asc(), Invoice.id.asc())
+
+    report_header = {
         "report_name": "Sales Report",
         "company_id": company_id,
         "period_start": start_date.isoformat(),
         "period_end": end_date.isoformat(),
-        "total_sales_amount": total_sales_amount,
-        "number_of_invoices": len(invoices),
-        "invoices": [invoice.to_dict() for invoice in invoices]
-    }), 200
+    }
+    if wants_ndjson():
+        # One line per invoice, then a trailing summary record with the totals
+        def records():
+            total, count = 0.0, 0
+            for batch in iter_batches(iter_query(invoices_query)):
+                for record in Invoice.to_dicts(batch): # Line items loaded once per batch
+                    total += record["total_amount"]
+                    count += 1
+                    yield record
+            yield {"summary": dict(report_header, total_sales_amount=total, number_of_invoices=count)}
+        return ndjson_response(records())
+
+    # Totals and breakdowns are aggregated in SQL
+    total_sales_amount, number_of_invoices = db.session.query(func.sum(Invoice.total_amount), func.count(Invoice.id)).filter(*conditions).one()
+    amount_sum = func.sum(Invoice.total_amount)
+    report = {
+        **report_header,
+        "total_sales_amount": total_sales_amount or 0.0,
+        "number_of_invoices": number_of_invoices,
+        "breakdowns": {
+            "by_status": _breakdown(db.session.query(Invoice.status, amount_sum, func.count(Invoice.id)).filter(*conditions)
+                                    .group_by(Invoice.status).order_by(amount_sum.desc()), "status", "total_amount", "count"),
+            "by_customer": _breakdown(db.session.query(Invoice.customer_name, amount_sum, func.count(Invoice.id)).filter(*conditions)
+                                      .group_by(Invoice.customer_name).order_by(amount_sum.desc()), "customer_name", "total_amount", "count"),
+        },
+    }
+    if _include_details():
+        invoices, next_cursor = keyset_page(Invoice.query.filter(*conditions), [Invoice.issue_date, Invoice.id])
+        report["invoices"] = Invoice.to_dicts(invoices)
+        report["next_cursor"] = next_cursor
+    return jsonify(report), 200
 
 @reports_bp.route("/reports/expense_report", methods=["GET"]) # Path relative to blueprint
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view reports for this company")
+@conditional_get(EXPENSES)
+@cached_report(EXPENSES)
 def get_expense_report(company_id): # Add company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER], 
-                             allow_owner=True, allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view reports for this company"}), 403
-
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
@@ -153,114 +182,288 @@ def get_expense_report(company_id): # Add company_id
     if start_date > end_date:
         return jsonify({"message": "Start date cannot be after end date."}), 400
 
-    expenses_query = Expense.query.filter(
+    conditions = (
         Expense.company_id == company_id, # Filter by company
         Expense.date_incurred >= start_date,
         Expense.date_incurred <= end_date
         # Expense.user_id == current_user.id # Decide if user-specific filtering is still needed
-    ).order_by(Expense.date_incurred.asc())
-    
-    expenses = expenses_query.all()
-    total_expenses = sum(expense.amount for expense in expenses)
-    return jsonify({
+    )
+    expenses_query = Expense.query.filter(*conditions).order_by(Expense.date_incurred.asc(), Expense.id.asc())
+    serialize = serializer_for(Expense)
+
+    if wants_ndjson():
+        def records():
+            total = 0.0
+            for expense in iter_query(expenses_query):
+                total += expense.amount
+                yield serialize(expense)
+            yield {"summary": {
+                "report_name": "Expense Report",
+                "company_id": company_id,
+                "period_start": start_date.isoformat(),
+                "period_end": end_date.isoformat(),
+                "total_expenses": total,
+            }}
+        return ndjson_response(records())
+
+    # Total and category breakdown come from the daily aggregates, the vendor breakdown from a grouped query
+    total_expenses, number_of_expenses = range_total(DailyExpenseAgg, company_id, start_date, end_date)
+    category_sum = func.sum(DailyExpenseAgg.total)
+    by_category = _breakdown(
+        db.session.query(DailyExpenseAgg.category, category_sum, func.sum(DailyExpenseAgg.count)).filter(
+            DailyExpenseAgg.company_id == company_id, DailyExpenseAgg.day >= start_date, DailyExpenseAgg.day <= end_date
+        ).group_by(DailyExpenseAgg.category).order_by(category_sum.desc()), "category", "total_amount", "count")
+    for group in by_category:
+        group["category"] = group["category"] or None # Uncategorized expenses are aggregated under ""
+    amount_sum = func.sum(Expense.amount)
+    report = {
         "report_name": "Expense Report",
         "company_id": company_id,
         "period_start": start_date.isoformat(),
         "period_end": end_date.isoformat(),
         "total_expenses": total_expenses,
-        "expense_details": [expense.to_dict() for expense in expenses]
-    }), 200
+        "number_of_expenses": number_of_expenses,
+        "breakdowns": {
+            "by_category": by_category,
+            "by_vendor": _breakdown(db.session.query(Expense.vendor, amount_sum, func.count(Expense.id)).filter(*conditions)
+                                    .group_by(Expense.vendor).order_by(amount_sum.desc()), "vendor", "total_amount", "count"),
+        },
+    }
+    if _include_details():
+        expenses, next_cursor = keyset_page(Expense.query.filter(*conditions), [Expense.date_incurred, Expense.id])
+        report["expense_details"] = serialize.many(expenses)
+        report["next_cursor"] = next_cursor
+    return jsonify(report), 200
 
 @reports_bp.route("/reports/inventory_summary", methods=["GET"]) # Path relative to blueprint
-@jwt_required()
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view reports for this company")
+@conditional_get(INVENTORY, weak=True)
+@cached_report(INVENTORY)
 def get_inventory_summary(company_id): # Add company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR, CompanyRoleEnum.VIEWER], 
-                             allow_owner=True, allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view reports for this company"}), 403
-
-    inventory_items = InventoryItem.query.filter_by(company_id=company_id).order_by(InventoryItem.name.asc()).all()
     # Note: No date filtering for this summary report by default.
-
-    report_items = []
-    total_inventory_value = 0.0
-
-    for item in inventory_items:
-        item_stock_value = (item.sale_price or 0.0) * (item.quantity_on_hand or 0)
-        total_inventory_value += item_stock_value
-        report_items.append({
-            "id": item.id,
-            "company_id": item.company_id, # Explicitly show company_id for clarity
-            "name": item.name,
-            "sku": item.sku,
-            "quantity_on_hand": item.quantity_on_hand,
-            "sale_price": item.sale_price,
-            "current_stock_value_at_sale_price": item_stock_value
-        })
-
-    return jsonify({
+    group_by = request.args.get('group_by')
+    if group_by and group_by not in VALUATION_GROUPS:
+        return jsonify({"message": f"Invalid group_by. Supported values are: {', '.join(VALUATION_GROUPS)}."}), 400
+
+    # Totals at cost and at sale price are SQL aggregates, cached until the next inventory write
+    summary = valuation_summary(company_id, group_by)
+    details_query = valuation_details_query(company_id)
+    order_columns = [InventoryItem.name, InventoryItem.id]
+
+    if wants_ndjson():
+        def records():
+            for row in iter_query(details_query.order_by(*order_columns)):
+                yield row._asdict()
+            yield {"summary": {
+                "report_name": "Inventory Summary Report",
+                "company_id": company_id,
+                "generated_at": datetime.utcnow().isoformat(),
+                **summary,
+            }}
+        return ndjson_response(records())
+
+    report = {
         "report_name": "Inventory Summary Report",
         "company_id": company_id,
         "generated_at": datetime.utcnow().isoformat(),
-        "total_inventory_value_at_sale_price": total_inventory_value,
-        "number_of_items": len(report_items),
-        "inventory_details": report_items
-    }), 200
+        **summary,
+    }
+    if _include_details():
+        rows, next_cursor = keyset_page(details_query, order_columns)
+        report["inventory_details"] = [row._asdict() for row in rows]
+        report["next_cursor"] = next_cursor
+    return jsonify(report), 200
 
 @reports_bp.route("/reports/employee_payroll", methods=["GET"]) # Path relative to blueprint
-@jwt_required()
+@company_access_required(roles=EDITOR_ROLES, message="Unauthorized to view payroll reports for this company")
+@conditional_get(EMPLOYEES, SALARIES)
+@cached_report(EMPLOYEES, SALARIES)
 def get_employee_payroll_summary(company_id): # Add company_id
-    current_user = _get_current_user()
-    if not current_user:
-        return jsonify({"message": "Authentication required"}), 401
-
-    company = Company.query.get_or_404(company_id)
-    if not _check_permission(current_user, company, 
-                             allowed_company_roles=[CompanyRoleEnum.ADMIN, CompanyRoleEnum.EDITOR], # Payroll might be more restricted
-                             allow_owner=True, allow_system_admin=True):
-        return jsonify({"message": "Unauthorized to view payroll reports for this company"}), 403
-
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
-
-    if not start_date_str or not end_date_str:
-        return jsonify({"message": "Both start_date and end_date are required parameters."}), 400
-
-    try:
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-        end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-    except ValueError:
-        return jsonify({"message": "Invalid date format. Please use YYYY-MM-DD."}), 400
+    year_str = request.args.get('year')
+
+    if year_str and not (start_date_str or end_date_str):
+        # ?year=YYYY is shorthand for the whole calendar year
+        try:
+            start_date, end_date = date(int(year_str), 1, 1), date(int(year_str), 12, 31)
+        except ValueError:
+            return jsonify({"message": "Invalid year. Please use YYYY."}), 400
+    else:
+        if not start_date_str or not end_date_str:
+            return jsonify({"message": "Both start_date and end_date are required parameters."}), 400
+
+        try:
+            start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"message": "Invalid date format. Please use YYYY-MM-DD."}), 400
 
     if start_date > end_date:
         return jsonify({"message": "Start date cannot be after end date."}), 400
 
+    group_by = request.args.get('group_by')
+    if group_by and group_by != 'employee':
+        return jsonify({"message": "Invalid group_by. Supported values are: employee."}), 400
+
     # Join Salary with Employee to filter by company_id
-    salaries_query = Salary.query.join(Employee, Salary.employee_id == Employee.id).filter(
+    conditions = (
         Employee.company_id == company_id, # Filter by company
         Salary.payment_date >= start_date,
         Salary.payment_date <= end_date
-    ).order_by(Salary.payment_date.asc(), Salary.employee_id.asc())
-    
-    salaries = salaries_query.all()
-
-    total_gross_pay = sum(s.gross_amount for s in salaries)
-    total_deductions = sum(s.deductions for s in salaries)
-    total_net_pay = sum(s.net_amount for s in salaries)
-
-    return jsonify({
+    )
+    totals = (func.sum(Salary.gross_amount), func.sum(Salary.deductions), func.sum(Salary.net_amount), func.count(Salary.id))
+    employee_names = ("employee_id", "first_name", "last_name", "total_gross_pay", "total_deductions", "total_net_pay", "count")
+
+    if group_by == 'employee':
+        if start_date == date(start_date.year, 1, 1) and end_date == date(end_date.year, 12, 31):
+            # Whole calendar years: one employee_payroll_years row per employee and year, whatever the number of payments
+            employees_query = payroll_by_employee(company_id, start_date.year, end_date.year)
+        else:
+            employees_query = db.session.query(Employee.id, Employee.first_name, Employee.last_name, *totals).join(
+                Salary, Salary.employee_id == Employee.id).filter(*conditions).group_by(
+                Employee.id, Employee.first_name, Employee.last_name).order_by(totals[0].desc(), Employee.id)
+        employees = [dict(zip(employee_names, row)) for row in employees_query.all()]
+        return jsonify({
+            "report_name": "Employee Payroll Summary",
+            "company_id": company_id,
+            "period_start": start_date.isoformat(),
+            "period_end": end_date.isoformat(),
+            "group_by": "employee",
+            "total_gross_pay": sum(row["total_gross_pay"] or 0.0 for row in employees),
+            "total_deductions": sum(row["total_deductions"] or 0.0 for row in employees),
+            "total_net_pay": sum(row["total_net_pay"] or 0.0 for row in employees),
+            "number_of_payments_made": sum(row["count"] for row in employees),
+            "employees": employees,
+        }), 200
+    salaries_query = Salary.query.join(Employee, Salary.employee_id == Employee.id).filter(*conditions).order_by(Salary.payment_date.asc(), Salary.id.asc())
+    serialize = serializer_for(Salary)
+
+    if wants_ndjson():
+        def records():
+            gross, deductions, net, count = 0.0, 0.0, 0.0, 0
+            for salary in iter_query(salaries_query):
+                gross += salary.gross_amount
+                deductions += salary.deductions
+                net += salary.net_amount
+                count += 1
+                yield serialize(salary)
+            yield {"summary": {
+                "report_name": "Employee Payroll Summary",
+                "company_id": company_id,
+                "period_start": start_date.isoformat(),
+                "period_end": end_date.isoformat(),
+                "total_gross_pay": gross,
+                "total_deductions": deductions,
+                "total_net_pay": net,
+                "number_of_payments_made": count,
+            }}
+        return ndjson_response(records())
+
+    # Totals and the per-employee breakdown are aggregated in SQL
+    total_gross_pay, total_deductions, total_net_pay, number_of_payments = db.session.query(*totals).join(
+        Employee, Salary.employee_id == Employee.id).filter(*conditions).one()
+    by_employee = _breakdown(
+        db.session.query(Employee.id, Employee.first_name, Employee.last_name, *totals).join(Salary, Salary.employee_id == Employee.id)
+        .filter(*conditions).group_by(Employee.id, Employee.first_name, Employee.last_name).order_by(totals[0].desc()),
+        *employee_names)
+
+    report = {
         "report_name": "Employee Payroll Summary",
         "company_id": company_id,
         "period_start": start_date.isoformat(),
         "period_end": end_date.isoformat(),
-        "total_gross_pay": total_gross_pay,
-        "total_deductions": total_deductions,
-        "total_net_pay": total_net_pay,
-        "number_of_payments_made": len(salaries),
-        "payroll_details": [salary.to_dict() for salary in salaries]
-    }), 200
\ No newline at end of file
+        "total_gross_pay": total_gross_pay or 0.0,
+        "total_deductions": total_deductions or 0.0,
+        "total_net_pay": total_net_pay or 0.0,
+        "number_of_payments_made": number_of_payments,
+        "breakdowns": {"by_employee": by_employee},
+    }
+    if _include_details():
+        salaries, next_cursor = keyset_page(Salary.query.join(Employee, Salary.employee_id == Employee.id).filter(*conditions), [Salary.payment_date, Salary.id])
+        report["payroll_details"] = serialize.many(salaries)
+        report["next_cursor"] = next_cursor
+    return jsonify(report), 200
+
+# Reports that can run as asynchronous jobs: name -> (view, roles allowed to run it)
+REPORT_JOBS = {
+    "profit_and_loss": (get_profit_and_loss_report, ALL_COMPANY_ROLES),
+    "sales_report": (get_sales_report, ALL_COMPANY_ROLES),
+    "expense_report": (get_expense_report, ALL_COMPANY_ROLES),
+    "inventory_summary": (get_inventory_summary, ALL_COMPANY_ROLES),
+    "employee_payroll": (get_employee_payroll_summary, EDITOR_ROLES),
+}
+
+
+def _job_dict(job):
+    job_dict = job.to_dict()
+    job_dict["result_url"] = url_for("reports_bp.get_report_job_result", company_id=job.company_id, job_id=job.id) if job.result is not None else None
+    return job_dict
+
+
+def _get_company_job(company_id, job_id):
+    """Returns (job, None) or (None, error response) for a job of this company the current user may see."""
+    job = ReportJob.query.filter_by(id=job_id, company_id=company_id).first()
+    if job is None:
+        return None, (jsonify({"message": "Report job not found in this company"}), 404)
+    _, roles = REPORT_JOBS.get(job.report, (None, EDITOR_ROLES))
+    if not g.company_access.allows(roles):
+        return None, (jsonify({"message": "Unauthorized to view this report job"}), 403)
+    return job, None
+
+
+@reports_bp.route("/reports/<report_name>/jobs", methods=["POST"])
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view reports for this company")
+def create_report_job(company_id, report_name):
+    if report_name not in REPORT_JOBS:
+        return jsonify({"message": f"Unknown report '{report_name}'. Supported reports are: {', '.join(REPORT_JOBS)}."}), 404
+    view, roles = REPORT_JOBS[report_name]
+    if not g.company_access.allows(roles):
+        return jsonify({"message": "Unauthorized to run this report for this company"}), 403
+
+    # Report parameters come from the query string and/or a JSON object body, e.g. {"start_date": "2024-01-01", ...}
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Request body must be a JSON object of report parameters"}), 400
+    params = {**request.args.to_dict(), **{key: str(value) for key, value in data.items()}}
+    params.pop("stream", None) # Results are stored as JSON
+
+    report_job_runner.reserve() # ReportJobsBusy (503) when the queue is full
+    try:
+        job = ReportJob(company_id=company_id, report=report_name, params=json.dumps(params, sort_keys=True),
+                        status=QUEUED, requested_by_user_id=g.company_access.user_id)
+        db.session.add(job)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        report_job_runner.release()
+        raise
+    # The worker calls the view below company_access_required: access was checked here, and there is no token in the job
+    report_job_runner.start(job.id, view.__wrapped__, url_for(f"reports_bp.{view.__name__}", company_id=company_id))
+
+    response = jsonify(_job_dict(job))
+    response.headers["Location"] = url_for("reports_bp.get_report_job", company_id=company_id, job_id=job.id)
+    return response, 202
+
+
+@reports_bp.route("/reports/jobs/<int:job_id>", methods=["GET"])
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view reports for this company")
+def get_report_job(company_id, job_id):
+    job, error = _get_company_job(company_id, job_id)
+    if error:
+        return error
+    return jsonify(_job_dict(job)), 200
+
+
+@reports_bp.route("/reports/jobs/<int:job_id>/result", methods=["GET"])
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to view reports for this company")
+def get_report_job_result(company_id, job_id):
+    job, error = _get_company_job(company_id, job_id)
+    if error:
+        return error
+    if job.status in (QUEUED, RUNNING):
+        return jsonify(_job_dict(job)), 202, {"Retry-After": "2"}
+    if job.result is None:
+        return jsonify({"message": "Report job failed", "error": job.error}), 500
+    # The stored report body as produced by the report endpoint (including its 4xx error responses)
+    return current_app.response_class(job.result, status=job.result_status, mimetype="application/json")
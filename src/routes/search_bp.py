@@ -0,0 +1,33 @@
+from flask import Blueprint, request, jsonify
+from src.extensions import db
+from src.utils.search import ENTITIES, search, search_supported
+from src.decorators.auth_decorators import company_access_required, ALL_COMPANY_ROLES
+
+search_bp = Blueprint("search_bp", __name__)
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+@search_bp.route("/search", methods=["GET"])
+@company_access_required(roles=ALL_COMPANY_ROLES, message="Unauthorized to search this company")
+def search_company(company_id):
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"message": "Missing search query (q)"}), 400
+    if not search_supported(db.engine):
+        return jsonify({"message": "Full-text search is not available on this database"}), 501
+
+    # Optional comma separated entity types, e.g. ?types=expense,invoice
+    types = [t for t in (request.args.get("types") or "").split(",") if t]
+    unknown = [t for t in types if t not in ENTITIES]
+    if unknown:
+        return jsonify({"message": f"Unsupported search types: {', '.join(unknown)}. Supported types are: {', '.join(ENTITIES)}"}), 400
+
+    try:
+        limit = int(request.args.get("limit") or DEFAULT_SEARCH_LIMIT)
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), 400
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    return jsonify({"query": q, "results": search(company_id, q, types=types, limit=limit)}), 200
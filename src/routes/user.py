@@ -1,20 +1,23 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db, RoleEnum # Import RoleEnum
+from src.extensions import access_cache
 from src.models.company import Company # Import Company model
 from src.models.employee import Employee # Import Employee model
-from werkzeug.security import check_password_hash # generate_password_hash is in User model
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
 from flask_jwt_extended import jwt_required, get_jwt_identity # For protection
 from datetime import datetime # For hire_date parsing
 from src.decorators.auth_decorators import system_admin_required # Import the decorator
+from src.utils.pagination import list_response
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
 @system_admin_required # Use the new decorator
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    # employee_profile is loaded by the same query (Employee.user_id is unique), not once per user
+    users = User.query.outerjoin(User.employee_profile).options(contains_eager(User.employee_profile))
+    return list_response(users, [User.id], User.to_dict)
 
 @user_bp.route('/users', methods=['POST'])
 @system_admin_required # Use the new decorator
@@ -159,6 +162,7 @@ def update_user(user_id):
 
     try:
         db.session.commit()
+        access_cache.invalidate_user(user_id)
         return jsonify(user.to_dict()), 200
     except IntegrityError:
         db.session.rollback()
@@ -177,6 +181,7 @@ def promote_user_to_system_admin(user_id):
     
     try:
         db.session.commit()
+        access_cache.invalidate_user(user_id)
         return jsonify({"message": f"User {user_id} promoted to system administrator successfully.", "user": user.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -189,6 +194,7 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    access_cache.invalidate_user(user_id)
     return '', 204
 
 @user_bp.route('/users/me/password', methods=['PUT'])
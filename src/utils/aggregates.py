@@ -0,0 +1,274 @@
+"""
+Incrementally maintained aggregates.
+
+- daily_income_agg / daily_expense_agg hold SUM(amount) and COUNT(*) per (company_id, day, category).
+- employee_payroll_years holds gross, deductions, net and the number of payments per (employee_id, year).
+
+ORM flush events turn every insert, update and delete of a source record into (+/-) deltas, which
+are merged per key and applied with one upsert per touched key at the end of the flush, in the same
+transaction as the write. Date-range totals (profit and loss, report summaries) and year-to-date
+payroll figures then read a handful of rows instead of scanning the raw tables.
+
+Bulk SQL that bypasses the ORM (query.update/delete, raw INSERTs) is not seen by the events; run
+`flask aggregates rebuild` after such changes.
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import Integer, event, select, insert, update, delete, func, and_, cast, extract, literal, union_all
+from sqlalchemy.orm import Session, object_session
+from src.extensions import db
+from src.models.company import Company
+from src.models.employee import Employee
+from src.models.income import Income
+from src.models.expense import Expense
+from src.models.salary import Salary
+from src.models.daily_aggregate import DailyIncomeAgg, DailyExpenseAgg
+from src.models.payroll_rollup import EmployeePayrollYear
+from src.utils.periods import bucket_expression, check_bucket_count, iter_buckets
+
+# Aggregate model -> (key columns, summed columns). The first key column is the owner whose deletion
+# drops its rows; the last summed column counts the source records, and rows dropping to 0 are deleted.
+LAYOUTS = {
+    DailyIncomeAgg: (("company_id", "day", "category"), ("total", "count")),
+    DailyExpenseAgg: (("company_id", "day", "category"), ("total", "count")),
+    EmployeePayrollYear: (("employee_id", "year"), ("gross_amount", "deductions", "net_amount", "payment_count")),
+}
+
+
+def _daily(date_attr):
+    return lambda record: ((record.company_id, getattr(record, date_attr), record.category or ""), (record.amount, 1))
+
+
+def _payroll_year(record):
+    return (record.employee_id, record.payment_date.year), (record.gross_amount, record.deductions or 0.0, record.net_amount, 1)
+
+
+# Source model -> (aggregate model, source columns it depends on, record -> (aggregate key, increments))
+SOURCES = {
+    Income: (DailyIncomeAgg, ("company_id", "date_received", "category", "amount"), _daily("date_received")),
+    Expense: (DailyExpenseAgg, ("company_id", "date_incurred", "category", "amount"), _daily("date_incurred")),
+    Salary: (EmployeePayrollYear, ("employee_id", "payment_date", "gross_amount", "deductions", "net_amount"), _payroll_year),
+}
+
+
+def _add_delta(target, agg_model, key, increments, sign):
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault("aggregate_deltas", {})
+    current = deltas.get((agg_model, key))
+    increments = tuple(sign * value for value in increments)
+    deltas[(agg_model, key)] = increments if current is None else tuple(a + b for a, b in zip(current, increments))
+
+
+def _make_listeners(model, agg_model, columns, extract_delta):
+    table = model.__table__
+
+    def inserted(mapper, connection, target):
+        _add_delta(target, agg_model, *extract_delta(target), 1)
+
+    def updating(mapper, connection, target):
+        state = db.inspect(target)
+        if not any(state.attrs[name].history.has_changes() for name in columns):
+            return
+        # Old values come from the row itself: the instance may not have loaded them before they were changed
+        old = connection.execute(select(*(table.c[name] for name in columns)).where(table.c.id == target.id)).one()
+        _add_delta(target, agg_model, *extract_delta(old), -1)
+        _add_delta(target, agg_model, *extract_delta(target), 1)
+
+    def deleting(mapper, connection, target):
+        # before_delete: the row still exists, so unloaded attributes can still be read
+        _add_delta(target, agg_model, *extract_delta(target), -1)
+
+    event.listen(model, "after_insert", inserted)
+    event.listen(model, "before_update", updating)
+    event.listen(model, "before_delete", deleting)
+
+
+for _model, (_agg_model, _columns, _extract_delta) in SOURCES.items():
+    _make_listeners(_model, _agg_model, _columns, _extract_delta)
+
+
+def _owner_deleted(owner_column):
+    def deleted(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("aggregate_deleted_owners", {}).setdefault(owner_column, set()).add(target.id)
+    return deleted
+
+event.listen(Company, "after_delete", _owner_deleted("company_id"))
+event.listen(Employee, "after_delete", _owner_deleted("employee_id"))
+
+
+def _apply_delta(connection, agg_model, key, increments):
+    table = agg_model.__table__
+    key_columns, sum_columns = LAYOUTS[agg_model]
+    values = dict(zip(key_columns, key), **dict(zip(sum_columns, increments)))
+    match = and_(*(table.c[name] == value for name, value in zip(key_columns, key)))
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(**values)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in key_columns],
+            set_={name: table.c[name] + stmt.excluded[name] for name in sum_columns},
+        ))
+    else:
+        result = connection.execute(update(table).where(match).values(
+            {name: table.c[name] + value for name, value in zip(sum_columns, increments)}))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**values))
+    if increments[-1] < 0:
+        connection.execute(delete(table).where(match, table.c[sum_columns[-1]] <= 0)) # Drop emptied rows
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_aggregate_deltas(session, flush_context):
+    deltas = session.info.pop("aggregate_deltas", None)
+    deleted_owners = session.info.pop("aggregate_deleted_owners", {})
+    if not deltas and not deleted_owners:
+        return
+    connection = session.connection()
+    for agg_model, (key_columns, _) in LAYOUTS.items():
+        owners = deleted_owners.get(key_columns[0])
+        if owners:
+            connection.execute(delete(agg_model.__table__).where(agg_model.__table__.c[key_columns[0]].in_(owners)))
+    for (agg_model, key), increments in (deltas or {}).items():
+        if key[0] in deleted_owners.get(LAYOUTS[agg_model][0][0], ()) or not any(increments):
+            continue
+        _apply_delta(connection, agg_model, key, increments)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_aggregate_deltas(session):
+    session.info.pop("aggregate_deltas", None)
+    session.info.pop("aggregate_deleted_owners", None)
+
+
+# --- Reads ---
+
+def range_total(agg_model, company_id, start_date, end_date):
+    """Returns (total, count) over [start_date, end_date] from the daily aggregate."""
+    total, count = db.session.query(func.sum(agg_model.total), func.sum(agg_model.count)).filter(
+        agg_model.company_id == company_id,
+        agg_model.day >= start_date,
+        agg_model.day <= end_date,
+    ).one()
+    return total or 0.0, count or 0
+
+
+def period_series(company_id, start_date, end_date, granularity):
+    """
+    Income, expenses and net per calendar bucket over [start_date, end_date], empty buckets included.
+    Both aggregates are read by a single UNION ALL + GROUP BY query.
+    Raises PeriodError if the range spans more than MAX_BUCKETS buckets.
+    """
+    check_bucket_count(start_date, end_date, granularity)
+    income = select(DailyIncomeAgg.day.label("day"), DailyIncomeAgg.total.label("income"), literal(0.0).label("expenses")).where(
+        DailyIncomeAgg.company_id == company_id, DailyIncomeAgg.day >= start_date, DailyIncomeAgg.day <= end_date)
+    expenses = select(DailyExpenseAgg.day, literal(0.0), DailyExpenseAgg.total).where(
+        DailyExpenseAgg.company_id == company_id, DailyExpenseAgg.day >= start_date, DailyExpenseAgg.day <= end_date)
+    combined = union_all(income, expenses).subquery()
+    bucket = bucket_expression(combined.c.day, granularity, db.session.get_bind().dialect.name).label("bucket")
+    # Grouped by the label: PostgreSQL does not match the expression's bound parameters in GROUP BY to the SELECT's
+    rows = db.session.execute(
+        select(bucket, func.sum(combined.c.income), func.sum(combined.c.expenses)).group_by(bucket.name)
+    ).all()
+    totals = {bucket_value: (income_total or 0.0, expense_total or 0.0) for bucket_value, income_total, expense_total in rows}
+
+    series = []
+    for start, period_start, period_end in iter_buckets(start_date, end_date, granularity):
+        income_total, expense_total = totals.get(start.isoformat(), (0.0, 0.0))
+        series.append({
+            "period_start": period_start.isoformat(),
+            "period_end": period_end.isoformat(),
+            "income": income_total,
+            "expenses": expense_total,
+            "net": income_total - expense_total,
+        })
+    return series
+
+
+def payroll_year_totals(employee_id, year):
+    """The employee's EmployeePayrollYear row for `year` (a primary key lookup), or None if nothing was paid."""
+    return db.session.get(EmployeePayrollYear, (employee_id, year))
+
+
+def payroll_by_employee(company_id, start_year, end_year):
+    """
+    Query of (employee_id, first_name, last_name, gross, deductions, net, count) per employee over
+    the calendar years [start_year, end_year], read from employee_payroll_years.
+    """
+    totals = (func.sum(EmployeePayrollYear.gross_amount), func.sum(EmployeePayrollYear.deductions),
+              func.sum(EmployeePayrollYear.net_amount), func.sum(EmployeePayrollYear.payment_count))
+    return db.session.query(Employee.id, Employee.first_name, Employee.last_name, *totals).join(
+        EmployeePayrollYear, EmployeePayrollYear.employee_id == Employee.id
+    ).filter(
+        Employee.company_id == company_id,
+        EmployeePayrollYear.year >= start_year,
+        EmployeePayrollYear.year <= end_year,
+    ).group_by(Employee.id, Employee.first_name, Employee.last_name).order_by(totals[0].desc(), Employee.id)
+
+
+def rebuild_aggregates(company_id=None):
+    """Recomputes the aggregate tables (or one company's rows) from the raw tables with INSERT ... SELECT."""
+    counts = {}
+
+    def count_rows(agg_table, scope):
+        # Counted rather than read from rowcount, which psycopg 3 reports as -1 for INSERT ... SELECT
+        return db.session.scalar(select(func.count()).select_from(agg_table).where(*scope))
+
+    for model, agg_model, date_attr in ((Income, DailyIncomeAgg, "date_received"), (Expense, DailyExpenseAgg, "date_incurred")):
+        agg_table = agg_model.__table__
+        date_column = getattr(model, date_attr)
+        category = func.coalesce(model.category, "").label("category_key")
+        source = select(
+            model.company_id, date_column, category, func.sum(model.amount), func.count()
+        ).group_by(model.company_id, date_column, category.name)
+        scope = []
+        if company_id is not None:
+            scope = [agg_table.c.company_id == company_id]
+            source = source.where(model.company_id == company_id)
+        db.session.execute(delete(agg_table).where(*scope))
+        db.session.execute(insert(agg_table).from_select(["company_id", "day", "category", "total", "count"], source))
+        counts[agg_table.name] = count_rows(agg_table, scope)
+
+    payroll_table = EmployeePayrollYear.__table__
+    year = cast(extract("year", Salary.payment_date), Integer) # EXTRACT is numeric on PostgreSQL
+    source = select(
+        Salary.employee_id, year, func.sum(Salary.gross_amount), func.sum(func.coalesce(Salary.deductions, 0.0)),
+        func.sum(Salary.net_amount), func.count()
+    ).group_by(Salary.employee_id, year)
+    scope = []
+    if company_id is not None:
+        company_employees = select(Employee.id).where(Employee.company_id == company_id)
+        scope = [payroll_table.c.employee_id.in_(company_employees)]
+        source = source.where(Salary.employee_id.in_(company_employees))
+    db.session.execute(delete(payroll_table).where(*scope))
+    db.session.execute(insert(payroll_table).from_select(
+        ["employee_id", "year", "gross_amount", "deductions", "net_amount", "payment_count"], source))
+    counts[payroll_table.name] = count_rows(payroll_table, scope)
+    db.session.commit()
+    return counts
+
+
+@click.group(name='aggregates')
+def aggregates_cli():
+    """Commands to manage the income/expense and payroll aggregates."""
+    pass
+
+@aggregates_cli.command("rebuild")
+@click.option("--company-id", type=int, default=None, help="Only rebuild this company's rows.")
+@with_appcontext
+def rebuild_aggregates_command(company_id):
+    """Rebuilds daily_income_agg, daily_expense_agg and employee_payroll_years from the raw tables."""
+    counts = rebuild_aggregates(company_id)
+    click.echo("Aggregates rebuilt: " + ", ".join(f"{count} {table} rows" for table, count in counts.items()))
+
+
+def register_aggregate_commands(app):
+    """Registers aggregate maintenance commands with the Flask application."""
+    app.cli.add_command(aggregates_cli)
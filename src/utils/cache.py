@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU cache with an optional per-entry TTL.
+    Used for hot, read-mostly lookups (e.g. authorization roles) that are invalidated explicitly on writes.
+    The TTL bounds staleness across processes, since invalidation only reaches the local process.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_entries=None, ttl_seconds=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds
+            self._entries.clear()
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Removes every entry whose key matches predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class AccessCache(LRUCache):
+    """
+    Cache of authorization data keyed by (user_id, company_id).
+    (user_id, company_id) -> CompanyAccess, and (user_id, None) -> the user's system RoleEnum.
+    """
+
+    def init_app(self, app):
+        self.configure(max_entries=app.config.setdefault("ACCESS_CACHE_MAX_ENTRIES", 10000),
+                       ttl_seconds=app.config.setdefault("ACCESS_CACHE_TTL_SECONDS", 300))
+
+    def invalidate_user(self, user_id):
+        self.delete_where(lambda key: key[0] == user_id)
+
+    def invalidate_company(self, company_id):
+        self.delete_where(lambda key: key[1] == company_id)
+
+    def invalidate_membership(self, user_id, company_id):
+        self.delete((user_id, company_id))
+
+
+class _Flight:
+    """A computation in progress that identical requests wait for instead of repeating it."""
+    __slots__ = ("done", "value", "shared")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.shared = False # True once the leader produced a cacheable value
+
+
+class ReportCache:
+    """
+    LRU cache of rendered reports, bounded by the total size of the cached bodies.
+    Keys include the data versions a report was built from, so a write makes the old entries
+    unreachable and they age out of the LRU; only a deleted company's entries are dropped explicitly.
+    Concurrent misses on the same key are coalesced (single flight): the first request computes
+    and the others wait for its result. Like the other caches this is per process.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, wait_seconds=30):
+        self.max_bytes = max_bytes
+        self.wait_seconds = wait_seconds
+        self._entries = OrderedDict() # key -> (size, value)
+        self._inflight = {} # key -> _Flight
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        with self._lock:
+            self.max_bytes = app.config.setdefault("REPORT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+            self.wait_seconds = app.config.setdefault("REPORT_CACHE_WAIT_SECONDS", 30)
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get_or_compute(self, key, compute, before_wait=None):
+        """
+        Returns the cached value for `key`, or computes it with compute() -> (value, size).
+        A size of None marks the value as not cacheable (it is returned to the caller only).
+        - before_wait: called before blocking on another request's computation, e.g. to release a database connection.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if before_wait:
+                before_wait()
+            if flight.done.wait(self.wait_seconds) and flight.shared:
+                return flight.value
+            return compute()[0] # The leader failed, timed out or produced an uncacheable result
+
+        try:
+            value, size = compute()
+            if size is not None:
+                flight.value, flight.shared = value, True
+                self._store(key, value, size)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[0]
+            self._entries[key] = (size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate_company(self, company_id):
+        """Drops the cached reports of a company (keys start with the company id), e.g. when it is deleted."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == company_id]:
+                size, _ = self._entries.pop(key)
+                self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "in_flight": len(self._inflight),
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,115 @@
+"""
+Per-company data versions for conditional GETs.
+
+Every insert/update/delete of a company's records bumps the (company_id, entity) row of the
+data_versions table in the same transaction, once per flush. Listing and report endpoints derive
+their ETag / Last-Modified from the versions of the entities they read (see
+src/decorators/cache_decorators.py), so an unchanged poll is answered from one primary key lookup.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, insert, select, update, delete
+from sqlalchemy.orm import Session, object_session
+from src.models.company import Company
+from src.models.income import Income
+from src.models.expense import Expense
+from src.models.invoice import Invoice, InvoiceItem
+from src.models.inventory_item import InventoryItem
+from src.models.employee import Employee
+from src.models.salary import Salary
+from src.models.data_version import DataVersion
+
+INCOME = "income"
+EXPENSES = "expenses"
+INVOICES = "invoices"
+INVENTORY = "inventory"
+EMPLOYEES = "employees"
+SALARIES = "salaries"
+
+_table = DataVersion.__table__
+
+
+def get_versions(session, company_id, entities):
+    """Returns {entity: (version, updated_at)} for the given entities; entities never written are absent."""
+    rows = session.execute(
+        select(_table.c.entity, _table.c.version, _table.c.updated_at)
+        .where(_table.c.company_id == company_id, _table.c.entity.in_(entities))
+    ).all()
+    return {entity: (version, updated_at) for entity, version, updated_at in rows}
+
+
+def _bump(connection, company_id, entity, now):
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(_table).values(company_id=company_id, entity=entity, version=1, updated_at=now)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[_table.c.company_id, _table.c.entity],
+            set_={"version": _table.c.version + 1, "updated_at": now},
+        ))
+        return
+    result = connection.execute(
+        update(_table).where(_table.c.company_id == company_id, _table.c.entity == entity)
+        .values(version=_table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(_table).values(company_id=company_id, entity=entity, version=1, updated_at=now))
+
+
+# --- Change tracking ---
+
+def _record(target, key, value):
+    session = object_session(target)
+    if session is not None and value is not None:
+        session.info.setdefault("data_changes", {}).setdefault(key, set()).add(value)
+
+
+def _listen(model, record):
+    event.listen(model, "after_insert", lambda mapper, connection, target: record(target))
+    event.listen(model, "after_update", lambda mapper, connection, target: record(target))
+    event.listen(model, "after_delete", lambda mapper, connection, target: record(target))
+
+
+# Records that carry company_id directly
+for _model, _entity in ((Income, INCOME), (Expense, EXPENSES), (Invoice, INVOICES), (InventoryItem, INVENTORY), (Employee, EMPLOYEES)):
+    _listen(_model, lambda target, entity=_entity: _record(target, entity, target.company_id))
+
+# Child records, resolved to their company after the flush
+_listen(InvoiceItem, lambda target: _record(target, "invoice_ids", target.invoice_id))
+_listen(Salary, lambda target: _record(target, "employee_ids", target.employee_id))
+
+
+@event.listens_for(Company, "after_delete")
+def _company_deleted(mapper, connection, target):
+    _record(target, "deleted_companies", target.id)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_changed_versions(session, flush_context):
+    changes = session.info.pop("data_changes", None)
+    if not changes:
+        return
+    connection = session.connection()
+    pairs = {(company_id, entity) for entity in (INCOME, EXPENSES, INVOICES, INVENTORY, EMPLOYEES) for company_id in changes.get(entity, ())}
+    if changes.get("invoice_ids"):
+        rows = connection.execute(select(Invoice.company_id).where(Invoice.id.in_(changes["invoice_ids"])).distinct())
+        pairs.update((company_id, INVOICES) for (company_id,) in rows)
+    if changes.get("employee_ids"):
+        rows = connection.execute(select(Employee.company_id).where(Employee.id.in_(changes["employee_ids"])).distinct())
+        pairs.update((company_id, SALARIES) for (company_id,) in rows)
+
+    deleted_companies = changes.get("deleted_companies", set())
+    if deleted_companies:
+        connection.execute(delete(_table).where(_table.c.company_id.in_(deleted_companies)))
+    now = datetime.utcnow()
+    for company_id, entity in sorted(pairs):
+        if company_id not in deleted_companies:
+            _bump(connection, company_id, entity, now)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session):
+    session.info.pop("data_changes", None)
@@ -0,0 +1,3 @@
+class QueryParamError(ValueError):
+    """Raised for an invalid query string parameter; answered with 400 and the error message."""
+    pass
@@ -0,0 +1,49 @@
+"""
+Sparse fieldsets: `?fields=id,amount,date_incurred`.
+
+Requested fields are checked against the model's API_FIELDS whitelist and turned into a
+column-only query, so the database returns Row tuples for just those columns and no ORM
+objects are hydrated. Non-column fields (e.g. Invoice `items`) are filled in by the caller.
+"""
+from flask import request
+from src.utils.errors import QueryParamError
+from src.utils.serializers import serializer_for
+
+
+class FieldsError(QueryParamError):
+    pass
+
+
+def requested_fields(model):
+    """Returns the list of requested fields for `model`, or None if ?fields= was not given."""
+    raw = request.args.get("fields")
+    if not raw:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in names if name not in model.API_FIELDS]
+    if unknown or not names:
+        raise FieldsError(f"Unknown field(s): {', '.join(unknown)}. Allowed fields are: {', '.join(model.API_FIELDS)}")
+    return names
+
+
+def column_fields(model, fields):
+    return [name for name in fields if name in model.__table__.columns]
+
+
+def project(query, model, fields, extra_columns=()):
+    """Restricts `query` to the requested columns plus `extra_columns` (e.g. sort keys needed for cursors)."""
+    names = column_fields(model, fields)
+    columns = [getattr(model, name) for name in names]
+    columns += [column for column in extra_columns if column.key not in names]
+    return query.with_entities(*columns)
+
+
+def row_to_dict(row, model, fields):
+    """Serializes a projected Row with the same encoding as the model's to_dict."""
+    return serializer_for(model, column_fields(model, fields))(row)
+
+
+def fetch_fields(query, model, fields):
+    """Runs a single-record projected query and returns the serialized dict, or None if not found."""
+    row = project(query, model, fields).first()
+    return row_to_dict(row, model, fields) if row is not None else None
@@ -0,0 +1,77 @@
+"""
+Server-side filtering for list endpoints.
+
+Grammar: `field=value` (equality) or `field[op]=value`, combined with AND, e.g.
+    ?date_incurred[gte]=2024-01-01&date_incurred[lt]=2024-04-01&category=Travel&vendor[in]=Acme,Globex&amount[gt]=500
+
+Only the fields a model lists in API_FILTERS are accepted (each is backed by an index leading with
+company_id); anything else is rejected with 400 rather than silently falling back to a scan.
+Values are parsed to the column's type and bound as parameters.
+"""
+import re
+from datetime import datetime
+
+from flask import request
+from src.utils.errors import QueryParamError
+
+# Query parameters owned by other features, never treated as filters
+RESERVED_PARAMS = {"limit", "cursor", "fields", "stream"}
+
+_PARAM_RE = re.compile(r"^(\w+)(?:\[(\w+)\])?$")
+
+
+class FilterError(QueryParamError):
+    pass
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+# Filter type -> (value parser, allowed operators)
+FILTER_TYPES = {
+    "date": (_parse_date, ("eq", "gt", "gte", "lt", "lte")),
+    "number": (float, ("eq", "gt", "gte", "lt", "lte")),
+    "int": (int, ("eq", "in")),
+    "string": (str, ("eq", "in")),
+}
+
+
+def _condition(column, op, value):
+    if op == "eq":
+        return column == value
+    if op == "in":
+        return column.in_(value)
+    if op == "gt":
+        return column > value
+    if op == "gte":
+        return column >= value
+    if op == "lt":
+        return column < value
+    return column <= value # lte
+
+
+def parse_filters(model):
+    """Returns a list of SQL conditions for the request's filter parameters on `model`."""
+    conditions = []
+    for key, raw_value in request.args.items(multi=True):
+        if key in RESERVED_PARAMS:
+            continue
+        match = _PARAM_RE.match(key)
+        field, op = (match.group(1), match.group(2) or "eq") if match else (key, None)
+        if field not in model.API_FILTERS:
+            raise FilterError(f"Unsupported filter: {key}. Supported filters are: {', '.join(model.API_FILTERS)}")
+        parser, allowed_ops = FILTER_TYPES[model.API_FILTERS[field]]
+        if op not in allowed_ops:
+            raise FilterError(f"Unsupported operator for {field}: {op}. Supported operators are: {', '.join(allowed_ops)}")
+        try:
+            value = [parser(v) for v in raw_value.split(",")] if op == "in" else parser(raw_value)
+        except ValueError:
+            raise FilterError(f"Invalid value for {key}: {raw_value}")
+        conditions.append(_condition(getattr(model, field), op, value))
+    return conditions
+
+
+def apply_filters(query, model):
+    conditions = parse_filters(model)
+    return query.filter(*conditions) if conditions else query
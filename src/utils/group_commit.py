@@ -0,0 +1,203 @@
+"""
+Group commit for small inserts.
+
+With WRITE_GROUP_COMMIT enabled, `group_commit.insert(record)` hands the new record to a single
+committer thread instead of committing it in the request's own transaction. The committer takes
+every record queued at that moment (waiting at most WRITE_GROUP_COMMIT_WINDOW_MS for more, up to
+WRITE_GROUP_COMMIT_MAX_BATCH), inserts them in one flush and commits once, so concurrent requests
+share the fsync and the SQLite write lock. The flush-time listeners (aggregates, data versions,
+search index) also run once per batch. Each caller still gets its own result: if the shared
+transaction fails, the batch is retried one record per transaction and only the failing record's
+caller sees the error. A caller waits at most WRITE_GROUP_COMMIT_TIMEOUT seconds (e.g. behind a
+stuck committer) and then gets GroupCommitBusy (503). Its record is cancelled first: one still
+queued is never written, so a retry cannot insert it twice. Only a record already taken into a
+batch that has not finished by then has an unknown outcome.
+Disabled, insert() adds and commits in the request's session as the blueprints used to.
+"""
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import date
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+from src.extensions import db
+
+
+def _to_dict(record):
+    return record.to_dict()
+
+
+class GroupCommitBusy(Exception):
+    """Raised when a record was not committed within the timeout."""
+    pass
+
+
+class GroupCommitQueue:
+
+    def __init__(self, enabled=False, window_ms=2, max_batch=64, timeout=30):
+        self._app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self.batches = 0
+        self.records = 0
+        self.configure(enabled, window_ms, max_batch, timeout)
+
+    def configure(self, enabled=False, window_ms=2, max_batch=64, timeout=30):
+        self.enabled = enabled
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.timeout = timeout
+
+    def init_app(self, app):
+        self._app = app
+        self.configure(enabled=app.config.setdefault("WRITE_GROUP_COMMIT", False),
+                       window_ms=app.config.setdefault("WRITE_GROUP_COMMIT_WINDOW_MS", 2),
+                       max_batch=app.config.setdefault("WRITE_GROUP_COMMIT_MAX_BATCH", 64),
+                       timeout=app.config.setdefault("WRITE_GROUP_COMMIT_TIMEOUT", 30))
+
+    def insert(self, record, serialize=_to_dict):
+        """
+        Inserts and commits a new (transient) record and returns serialize(record), computed once
+        its primary key and defaults are set. Raises the insert's error, as a direct commit would,
+        or GroupCommitBusy if the record was not committed within the timeout.
+        """
+        if not self.enabled:
+            db.session.add(record)
+            db.session.commit()
+            return serialize(record)
+        future = Future()
+        self._start()
+        self._queue.put((record, serialize, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Still queued: the committer skips it, so the record is not written
+            raise GroupCommitBusy()
+
+    def _start(self):
+        # Started on first use, so that each (forked) worker process gets its own committer
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)) if self.window else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Drop the records whose caller gave up; the others can no longer be cancelled
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                with self._app.app_context():
+                    self._commit(batch)
+            except Exception as e:
+                # E.g. the rollback failed on a broken connection: fail the callers left waiting, keep committing
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch):
+        try:
+            db.session.add_all([record for record, _, _ in batch])
+            db.session.flush()
+            results = [serialize(record) for record, serialize, _ in batch]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0][2].set_exception(e)
+                return
+            for item in batch:
+                item[0].id = None # Rolled back: inserted again with a new primary key
+                self._commit([item])
+            return
+        self.batches += 1
+        self.records += len(batch)
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+group_commit = GroupCommitQueue()
+
+
+@click.group(name='writes')
+def writes_cli():
+    """Commands for the write path."""
+    pass
+
+@writes_cli.command("benchmark")
+@click.option("--seconds", default=3.0, show_default=True, help="Duration per mode.")
+@click.option("--clients", default=16, show_default=True, help="Concurrent clients, each inserting income records one at a time.")
+@with_appcontext
+def benchmark_group_commit(seconds, clients):
+    """Compares inserts/s with one commit per insert and with group commit, on a scratch database."""
+    from flask import current_app
+    from src.models.user import User
+    from src.models.company import Company
+    from src.models.income import Income
+    from src.utils.sqlite_profile import init_sqlite_profile
+
+    for enabled in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            # A throwaway app on its own database file, with the current app's SQLite profile
+            bench_app = Flask("write-benchmark")
+            bench_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            for key in ("SQLITE_PROFILE", "SQLITE_MMAP_SIZE", "SQLITE_CACHE_SIZE_KIB", "SQLITE_BUSY_TIMEOUT_MS"):
+                bench_app.config[key] = current_app.config.get(key)
+            db.init_app(bench_app)
+            init_sqlite_profile(bench_app)
+            with bench_app.app_context():
+                db.create_all()
+                user = User(username="bench", email="bench@example.com", password_hash="-")
+                db.session.add(user)
+                db.session.flush()
+                company = Company(name="Bench", owner_id=user.id)
+                db.session.add(company)
+                db.session.commit()
+                user_id, company_id = user.id, company.id
+
+            queue_ = GroupCommitQueue()
+            queue_.init_app(bench_app)
+            queue_.configure(enabled=enabled, window_ms=current_app.config.get("WRITE_GROUP_COMMIT_WINDOW_MS", 2),
+                             max_batch=current_app.config.get("WRITE_GROUP_COMMIT_MAX_BATCH", 64))
+            done = [0]
+            lock = threading.Lock()
+            deadline = time.monotonic() + seconds
+
+            def client(n):
+                i = 0
+                while time.monotonic() < deadline:
+                    with bench_app.app_context(): # One "request"
+                        queue_.insert(Income(description=f"Client {n} #{i}", amount=10.0 + i % 50, date_received=date(2024, 1, i % 28 + 1),
+                                             category="Sales", user_id=user_id, company_id=company_id))
+                    with lock:
+                        done[0] += 1
+                    i += 1
+
+            threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            with bench_app.app_context():
+                db.engine.dispose()
+        batches = f", {queue_.records / queue_.batches:.1f} records/commit" if queue_.batches else ""
+        click.echo(f"{'group commit' if enabled else 'commit per insert':<18} {done[0] / seconds:10.1f} inserts/s ({clients} clients{batches})")
+
+
+def register_write_commands(app):
+    """Registers write path commands with the Flask application."""
+    app.cli.add_command(writes_cli)
@@ -0,0 +1,111 @@
+"""
+Inventory valuation at cost (purchase_price) and at retail (sale_price), with the implied margin.
+
+Totals and groups are SQL aggregates over the company's items, so no item row is loaded to build
+the summary. Summaries are cached per process and checked against the company's inventory data
+version and its updated_at (src/utils/data_versions.py): every inventory write bumps the version,
+so the next report recomputes instead of serving a stale figure. The timestamp matters when a
+company is deleted and its id reused (SQLite): the new company's versions start again at 1, so the
+number alone could match a summary of the deleted company. Deleting a company also drops its
+entries from this process's cache (invalidate_company).
+"""
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import case, func
+from src.extensions import db
+from src.models.inventory_item import InventoryItem
+from src.utils.data_versions import INVENTORY, get_versions
+
+# Summaries kept per process (least recently used are evicted first)
+CACHE_SIZE = 256
+
+_quantity = func.coalesce(InventoryItem.quantity_on_hand, 0)
+STOCK_VALUE_AT_COST = _quantity * func.coalesce(InventoryItem.purchase_price, 0.0)
+STOCK_VALUE_AT_SALE_PRICE = _quantity * func.coalesce(InventoryItem.sale_price, 0.0)
+
+# ?group_by= values -> grouping expression
+VALUATION_GROUPS = {
+    "unit_of_measure": InventoryItem.unit_of_measure,
+    "stock_status": case((_quantity > 0, "in_stock"), else_="out_of_stock"),
+}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _totals():
+    return (
+        func.count(InventoryItem.id),
+        func.sum(_quantity),
+        func.sum(STOCK_VALUE_AT_COST),
+        func.sum(STOCK_VALUE_AT_SALE_PRICE),
+        func.sum(case((InventoryItem.purchase_price.is_(None), 1), else_=0)),
+    )
+
+
+def _valuation(count, quantity, cost, retail, unpriced):
+    cost, retail = cost or 0.0, retail or 0.0
+    margin = retail - cost
+    return {
+        "number_of_items": count,
+        "total_quantity_on_hand": quantity or 0,
+        "total_inventory_value_at_cost": cost,
+        "total_inventory_value_at_sale_price": retail,
+        "implied_margin": margin,
+        "implied_margin_percent": round(margin / retail * 100, 2) if retail else None,
+        "items_without_purchase_price": unpriced or 0, # Valued at 0 cost, so the margin is overstated by their retail value
+    }
+
+
+def _compute_summary(company_id, group_by):
+    totals = _totals()
+    summary = _valuation(*db.session.query(*totals).filter(InventoryItem.company_id == company_id).one())
+    if group_by:
+        # Grouped by the label, as PostgreSQL would not match the CASE's bound parameters to the SELECT's
+        group = VALUATION_GROUPS[group_by].label("valuation_group")
+        rows = db.session.query(group, *totals).filter(InventoryItem.company_id == company_id).group_by(group.name).order_by(totals[3].desc()).all()
+        summary["group_by"] = group_by
+        summary["groups"] = [{"group": row[0], **_valuation(*row[1:])} for row in rows]
+    return summary
+
+
+def valuation_summary(company_id, group_by=None):
+    """Totals (and optional groups) of the company's inventory valuation, served from the cache while inventory is unchanged."""
+    version = get_versions(db.session, company_id, [INVENTORY]).get(INVENTORY, (0, None)) # (number, updated_at)
+    key = (company_id, group_by)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == version:
+            _cache.move_to_end(key)
+            return cached[1]
+    summary = _compute_summary(company_id, group_by)
+    with _cache_lock:
+        _cache[key] = (version, summary)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return summary
+
+
+def invalidate_company(company_id):
+    """Drops the company's cached summaries, e.g. when the company is deleted."""
+    with _cache_lock:
+        for key in [key for key in _cache if key[0] == company_id]:
+            del _cache[key]
+
+
+def valuation_details_query(company_id):
+    """Per-item valuation rows (id, name, sku, quantities, prices and stock values) of the company's inventory."""
+    return db.session.query(
+        InventoryItem.id,
+        InventoryItem.company_id,
+        InventoryItem.name,
+        InventoryItem.sku,
+        InventoryItem.quantity_on_hand,
+        InventoryItem.purchase_price,
+        InventoryItem.sale_price,
+        STOCK_VALUE_AT_COST.label("current_stock_value_at_cost"),
+        STOCK_VALUE_AT_SALE_PRICE.label("current_stock_value_at_sale_price"),
+        (STOCK_VALUE_AT_SALE_PRICE - STOCK_VALUE_AT_COST).label("implied_margin"),
+    ).filter(InventoryItem.company_id == company_id)
@@ -0,0 +1,61 @@
+"""
+orjson-backed JSON provider for `app.json`.
+
+Selected with JSON_PROVIDER=orjson (the default when orjson is installed); JSON_PROVIDER=stdlib
+keeps Flask's default provider. orjson encodes dates, datetimes, enums, UUIDs and dataclasses
+natively, so the column serializers (src/utils/serializers.py) hand those values over unencoded.
+Output matches the default provider: sorted keys, ISO 8601 dates, indented only in debug mode.
+"""
+import decimal
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError: # Optional dependency, the stdlib provider is used without it
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    native_types = True # Dates, datetimes and enums are encoded by orjson itself
+    sort_keys = True
+    compact = None # None: indent in debug mode, like Flask's default provider
+    mimetype = "application/json"
+
+    def _option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._option(bool(kwargs.get("indent")))).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=_default, option=self._option(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Installs the configured JSON provider on `app`."""
+    name = app.config.get("JSON_PROVIDER") or ("orjson" if orjson else "stdlib")
+    app.config["JSON_PROVIDER"] = name
+    if name == "orjson":
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER=orjson requires the orjson package")
+        app.json = OrjsonProvider(app)
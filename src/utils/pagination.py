@@ -0,0 +1,118 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are requested with `?limit=N&cursor=<opaque>`. The cursor encodes the sort key values of
+the last row of the previous page, and the next page is selected with a row-value comparison
+`(sort_key, id) < (:last_sort_key, :last_id)`, so each page is an index range scan regardless of
+how deep into the collection it is (no OFFSET).
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from flask import request, jsonify
+from sqlalchemy import tuple_
+from src.utils.errors import QueryParamError
+from src.utils.streaming import wants_ndjson, iter_query, iter_batches, ndjson_response
+from src.utils.fields import project, row_to_dict
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(QueryParamError):
+    """Raised for an invalid `limit` or `cursor` query parameter (answered with 400)."""
+    pass
+
+
+def encode_cursor(values):
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, columns):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(raw, list) or len(raw) != len(columns):
+        raise PaginationError("Invalid cursor")
+    values = []
+    for column, value in zip(columns, raw):
+        python_type = column.type.python_type
+        try:
+            if value is not None and python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+        except ValueError:
+            raise PaginationError("Invalid cursor")
+        values.append(value)
+    return values
+
+
+def page_args():
+    """Returns (limit, cursor_token) from the request's query string."""
+    limit_str = request.args.get("limit")
+    try:
+        limit = int(limit_str) if limit_str else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE), request.args.get("cursor") or None
+
+
+def keyset_query(query, order_columns, descending=False, cursor=None):
+    """Orders `query` by the sort key and, if a cursor is given, starts it right after the cursor's row."""
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        key, bound = tuple_(*order_columns), tuple_(*values)
+        query = query.filter(key < bound if descending else key > bound)
+    return query.order_by(*[c.desc() if descending else c.asc() for c in order_columns])
+
+
+def keyset_page(query, order_columns, descending=False, limit=None, cursor=None):
+    """
+    Applies keyset ordering/filtering to `query` and returns (rows, next_cursor).
+    - order_columns: the sort key columns, ending with a unique column (normally the primary key).
+    - descending: direction applied to every sort column.
+    - limit / cursor: default to the request's `limit` and `cursor` query parameters.
+    """
+    if limit is None and cursor is None:
+        limit, cursor = page_args()
+    query = keyset_query(query, order_columns, descending, cursor)
+    rows = query.limit(limit + 1).all() # One extra row tells us whether there is a next page
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in order_columns])
+    return rows, next_cursor
+
+
+def page_response(items, next_cursor):
+    """Standard envelope for a page of a list endpoint."""
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def list_response(query, order_columns, serialize, descending=False, model=None, fields=None, attach=None):
+    """
+    Response for a list endpoint: one keyset page in the standard envelope, or, when the client asks
+    for NDJSON, every row from the cursor onwards streamed one record per line.
+    - model / fields: with a sparse fieldset, only those columns (plus the sort key) are selected.
+    - attach(rows, dicts): optional hook to add non-column data to a batch of serialized rows.
+    """
+    if fields:
+        query = project(query, model, fields, extra_columns=order_columns)
+        serialize = lambda row: row_to_dict(row, model, fields)
+
+    def render(rows):
+        dicts = [serialize(row) for row in rows]
+        if attach:
+            attach(rows, dicts)
+        return dicts
+
+    if wants_ndjson():
+        query = keyset_query(query, order_columns, descending, request.args.get("cursor") or None)
+        return ndjson_response(record for batch in iter_batches(iter_query(query)) for record in render(batch))
+    rows, next_cursor = keyset_page(query, order_columns, descending=descending)
+    return jsonify(page_response(render(rows), next_cursor))
@@ -0,0 +1,126 @@
+"""
+Password hashing on a bounded worker pool.
+
+The KDF is CPU-bound and releases the GIL, so running it on a fixed-size pool caps how many
+hashes run at once, independently of how many requests are in flight. Requests beyond
+PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE are rejected with PasswordHashingBusy (503)
+instead of piling up behind the KDF and pinning every web worker, and so are requests that waited
+PASSWORD_HASH_TIMEOUT seconds for their hash.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = "scrypt" # werkzeug's default
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full."""
+    pass
+
+
+class PasswordHasher:
+
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_queue=32, timeout=30):
+        self._executor = None
+        self.configure(method, workers, max_queue, timeout)
+
+    def configure(self, method=DEFAULT_METHOD, workers=None, max_queue=32, timeout=30):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.method = method
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._method_prefix = None
+
+    def init_app(self, app):
+        self.configure(method=app.config.setdefault("PASSWORD_HASH_METHOD", DEFAULT_METHOD),
+                       workers=app.config.setdefault("PASSWORD_HASH_WORKERS", None),
+                       max_queue=app.config.setdefault("PASSWORD_HASH_MAX_QUEUE", 32),
+                       timeout=app.config.setdefault("PASSWORD_HASH_TIMEOUT", 30))
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the hash is done (or cancelled), not just while this request waits
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Still queued: drop it; a hash already running frees its slot when it finishes
+            raise PasswordHashingBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def needs_rehash(self, password_hash):
+        """True if the stored hash was made with a different algorithm or cost than the configured one."""
+        if self._method_prefix is None:
+            # Stored hashes look like "<method>$<salt>$<hash>", with the method's default parameters filled in
+            self._method_prefix = generate_password_hash("", method=self.method).split("$", 1)[0]
+        return password_hash.split("$", 1)[0] != self._method_prefix
+
+
+password_hasher = PasswordHasher()
+
+
+@click.group(name='passwords')
+def passwords_cli():
+    """Commands for password hashing."""
+    pass
+
+@passwords_cli.command("benchmark")
+@click.option("--method", "methods", multiple=True, help="Hash method to measure, e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000. Repeatable.")
+@click.option("--seconds", default=3.0, show_default=True, help="Duration per method.")
+@click.option("--concurrency", default=8, show_default=True, help="Number of concurrent simulated logins.")
+@with_appcontext
+def benchmark_password_hashing(methods, seconds, concurrency):
+    """Reports password verifications (logins) per second for each hash setting."""
+    methods = methods or (password_hasher.method, "scrypt:32768:8:1", "pbkdf2:sha256:600000", "pbkdf2:sha256:260000")
+    for method in methods:
+        hasher = PasswordHasher(method=method, workers=password_hasher.workers, max_queue=concurrency)
+        stored = hasher.hash("benchmark-password")
+        done = [0]
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+
+        def login_loop():
+            while time.monotonic() < deadline:
+                hasher.verify(stored, "benchmark-password")
+                with lock:
+                    done[0] += 1
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=login_loop) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+        hasher.shutdown()
+        click.echo(f"{method:<28} {done[0] / elapsed:10.1f} logins/s ({hasher.workers} workers, {concurrency} clients)")
+
+
+def register_password_commands(app):
+    """Registers password hashing commands with the Flask application."""
+    app.cli.add_command(passwords_cli)
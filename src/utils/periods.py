@@ -0,0 +1,90 @@
+"""
+Calendar buckets for time-series reports: day, week (starting Monday), month, quarter, year.
+
+`bucket_expression` computes a bucket's start date ("YYYY-MM-DD") in SQL so that rows can be
+grouped by bucket in the database; `iter_buckets` enumerates the same buckets in Python so that
+empty ones can be filled in.
+A series is limited to MAX_BUCKETS buckets, so a wide range at a fine granularity is rejected
+instead of building millions of buckets.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import Integer, cast, func
+from src.utils.errors import QueryParamError
+
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+MAX_BUCKETS = 1000
+
+
+class PeriodError(QueryParamError):
+    """Raised for a date range that spans more than MAX_BUCKETS buckets (answered with 400)."""
+    pass
+
+
+def bucket_expression(column, granularity, dialect_name):
+    """SQL expression for the start date of `column`'s bucket, as a "YYYY-MM-DD" string."""
+    if dialect_name == "postgresql":
+        if granularity == "day":
+            return func.to_char(column, "YYYY-MM-DD")
+        return func.to_char(func.date_trunc(granularity, column), "YYYY-MM-DD")
+    # SQLite
+    if granularity == "day":
+        return func.strftime("%Y-%m-%d", column)
+    if granularity == "week":
+        return func.date(column, "weekday 0", "-6 days") # Monday of the week
+    if granularity == "month":
+        return func.strftime("%Y-%m-01", column)
+    if granularity == "quarter":
+        first_month = (cast(func.strftime("%m", column), Integer) - 1) // 3 * 3 + 1
+        return func.printf("%s-%02d-01", func.strftime("%Y", column), first_month)
+    return func.strftime("%Y-01-01", column)
+
+
+def bucket_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    if granularity == "year":
+        return date(day.year, 1, 1)
+    return day
+
+
+def next_bucket_start(start, granularity):
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    months = {"month": 1, "quarter": 3, "year": 12}[granularity]
+    month_index = start.month - 1 + months
+    return date(start.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def bucket_count(start_date, end_date, granularity):
+    """Number of buckets overlapping [start_date, end_date], computed without enumerating them."""
+    start, end = bucket_start(start_date, granularity), bucket_start(end_date, granularity)
+    if granularity == "day":
+        return (end - start).days + 1
+    if granularity == "week":
+        return (end - start).days // 7 + 1
+    months = (end.year - start.year) * 12 + end.month - start.month
+    return months // {"month": 1, "quarter": 3, "year": 12}[granularity] + 1
+
+
+def check_bucket_count(start_date, end_date, granularity):
+    """Raises PeriodError if [start_date, end_date] spans more than MAX_BUCKETS buckets of `granularity`."""
+    count = bucket_count(start_date, end_date, granularity)
+    if count > MAX_BUCKETS:
+        raise PeriodError(f"The date range spans {count} {granularity} periods; at most {MAX_BUCKETS} are allowed. "
+                          "Use a shorter range or a coarser granularity.")
+
+
+def iter_buckets(start_date, end_date, granularity):
+    """Yields (bucket_start, period_start, period_end) for every bucket overlapping [start_date, end_date], clipped to it."""
+    start = bucket_start(start_date, granularity)
+    while start <= end_date:
+        following = next_bucket_start(start, granularity)
+        yield start, max(start, start_date), min(following - timedelta(days=1), end_date)
+        start = following
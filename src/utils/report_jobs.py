@@ -0,0 +1,125 @@
+"""
+Asynchronous report jobs on a bounded worker pool.
+
+POST /reports/<name>/jobs stores a report_jobs row and runs the report on this pool instead of in
+the web worker; clients poll the job and fetch its stored result when it has succeeded. Jobs beyond
+REPORT_JOB_WORKERS + REPORT_JOB_MAX_QUEUE are rejected with ReportJobsBusy (503). The pool lives in
+the process that accepted the job, so jobs still queued or running when it stops are left behind;
+`flask report-jobs purge` marks them failed.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask import make_response
+from flask.cli import with_appcontext
+from src.extensions import db
+from src.models.report_job import ReportJob
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class ReportJobsBusy(Exception):
+    """Raised when the report job queue is full."""
+    pass
+
+
+class ReportJobRunner:
+
+    def __init__(self, workers=2, max_queue=16):
+        self._executor = None
+        self._app = None
+        self.configure(workers, max_queue)
+
+    def configure(self, workers=2, max_queue=16):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report-job")
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+
+    def init_app(self, app):
+        self._app = app
+        self.configure(workers=app.config.setdefault("REPORT_JOB_WORKERS", 2),
+                       max_queue=app.config.setdefault("REPORT_JOB_MAX_QUEUE", 16))
+
+    def reserve(self):
+        """Takes a queue slot for a job about to be created; raises ReportJobsBusy if there is none."""
+        if not self._slots.acquire(blocking=False):
+            raise ReportJobsBusy()
+
+    def release(self):
+        """Gives back a slot reserved for a job that was not started."""
+        self._slots.release()
+
+    def start(self, job_id, view, path):
+        """Runs `view` for the (committed) job on the pool, in its own request context. Uses the slot taken by reserve()."""
+        self._executor.submit(self._run, job_id, view, path)
+
+    def _run(self, job_id, view, path):
+        try:
+            with self._app.app_context():
+                job = db.session.get(ReportJob, job_id)
+                job.status, job.started_at = RUNNING, datetime.utcnow()
+                db.session.commit()
+                params = json.loads(job.params)
+                company_id = job.company_id
+            try:
+                # The report's own request: its query parameters, negotiated as plain JSON
+                with self._app.test_request_context(path, query_string=params, headers={"Accept": "application/json"}):
+                    response = make_response(view(company_id=company_id))
+                    body, status = response.get_data(as_text=True), response.status_code
+                    db.session.rollback() # The report only read; end its transaction before the next one
+                    _finish(job_id, SUCCEEDED if status == 200 else FAILED, result=body, result_status=status)
+            except Exception as e:
+                with self._app.app_context():
+                    db.session.rollback()
+                    _finish(job_id, FAILED, error=str(e))
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def _finish(job_id, status, result=None, result_status=None, error=None):
+    job = db.session.get(ReportJob, job_id)
+    job.status, job.finished_at = status, datetime.utcnow()
+    job.result, job.result_status, job.error = result, result_status, error
+    db.session.commit()
+
+
+report_job_runner = ReportJobRunner()
+
+
+@click.group(name='report-jobs')
+def report_jobs_cli():
+    """Commands to manage asynchronous report jobs."""
+    pass
+
+@report_jobs_cli.command("purge")
+@click.option("--days", default=7, show_default=True, help="Delete finished jobs older than this many days.")
+@click.option("--stale-hours", default=1, show_default=True, help="Mark jobs queued or running for longer than this as failed.")
+@with_appcontext
+def purge_report_jobs(days, stale_hours):
+    """Deletes old finished jobs and fails jobs abandoned by a stopped worker process."""
+    now = datetime.utcnow()
+    deleted = ReportJob.query.filter(
+        ReportJob.status.in_((SUCCEEDED, FAILED)), ReportJob.finished_at < now - timedelta(days=days)
+    ).delete(synchronize_session=False)
+    stale = ReportJob.query.filter(
+        ReportJob.status.in_((QUEUED, RUNNING)), ReportJob.created_at < now - timedelta(hours=stale_hours)
+    ).update({"status": FAILED, "finished_at": now, "error": "Abandoned by its worker process"}, synchronize_session=False)
+    db.session.commit()
+    click.echo(f"Purged {deleted} finished report job(s), marked {stale} stale job(s) as failed.")
+
+
+def register_report_job_commands(app):
+    """Registers report job commands with the Flask application."""
+    app.cli.add_command(report_jobs_cli)
@@ -0,0 +1,181 @@
+"""
+Token revocation by `jti`.
+
+Revoked tokens are persisted in the revoked_tokens table. Each process keeps an in-memory index
+(a Bloom filter in front of an exact set) that is loaded on first use and then kept up to date
+incrementally: local revocations are added immediately, and rows written by other processes are
+picked up at most every REVOCATION_SYNC_SECONDS by a query for the rows revoked since the newest
+one seen. That query re-reads the last REVOCATION_SYNC_OVERLAP_SECONDS: ids and revoked_at values
+are assigned before commit, so a row can become visible after newer ones (PostgreSQL sequences,
+slow transactions, clock skew between servers) and a plain `id > last_seen_id` would skip it.
+Every REVOCATION_RELOAD_SECONDS the index is rebuilt from the table, which drops purged rows.
+A token that is not revoked (the common case) is answered by the Bloom filter alone.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.exc import IntegrityError
+from src.extensions import db
+from src.models.revoked_token import RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, using double hashing of a single blake2b digest."""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class RevocationIndex:
+    """In-process index of revoked jtis, backed by the revoked_tokens table."""
+
+    def __init__(self, sync_seconds=5, overlap_seconds=60, reload_seconds=3600, error_rate=0.001):
+        self.sync_seconds = sync_seconds
+        self.overlap_seconds = overlap_seconds
+        self.reload_seconds = reload_seconds
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity=1000, error_rate=error_rate)
+        self._exact = set()
+        self._synced_through = None # Newest revoked_at seen
+        self._last_sync = None # None until the table has been loaded
+        self._last_reload = None
+
+    def init_app(self, app):
+        self.sync_seconds = app.config.setdefault("REVOCATION_SYNC_SECONDS", 5)
+        self.overlap_seconds = app.config.setdefault("REVOCATION_SYNC_OVERLAP_SECONDS", 60)
+        self.reload_seconds = app.config.setdefault("REVOCATION_RELOAD_SECONDS", 3600)
+
+    def _add_local(self, jti):
+        if jti in self._exact:
+            return
+        if self._bloom.count >= self._bloom.capacity:
+            # Keep the false positive rate bounded: rebuild a larger filter from the exact set
+            bloom = BloomFilter(capacity=self._bloom.capacity * 2, error_rate=self.error_rate)
+            for existing in self._exact:
+                bloom.add(existing)
+            self._bloom = bloom
+        self._bloom.add(jti)
+        self._exact.add(jti)
+
+    def _sync(self):
+        """Loads the rows revoked since the newest one seen, minus the overlap window (the whole table on first call)."""
+        query = db.session.query(RevokedToken.jti, RevokedToken.revoked_at)
+        synced_through = self._synced_through
+        if synced_through is not None:
+            query = query.filter(RevokedToken.revoked_at >= synced_through - timedelta(seconds=self.overlap_seconds))
+        rows = query.all()
+        with self._lock:
+            for jti, revoked_at in rows:
+                self._add_local(jti)
+                if self._synced_through is None or revoked_at > self._synced_through:
+                    self._synced_through = revoked_at
+            self._last_sync = time.monotonic()
+
+    def reload(self):
+        """Rebuilds the index from the table, dropping jtis whose rows were purged."""
+        rows = db.session.query(RevokedToken.jti, RevokedToken.revoked_at).all()
+        bloom = BloomFilter(capacity=max(1000, 2 * len(rows)), error_rate=self.error_rate)
+        exact = set()
+        for jti, _ in rows:
+            bloom.add(jti)
+            exact.add(jti)
+        now = time.monotonic()
+        with self._lock:
+            # Swapped in whole, so concurrent checks never see a partially loaded index
+            self._bloom, self._exact = bloom, exact
+            self._synced_through = max((revoked_at for _, revoked_at in rows), default=None)
+            self._last_sync = self._last_reload = now
+
+    def is_revoked(self, jti):
+        now = time.monotonic()
+        if self._last_reload is None or now - self._last_reload >= self.reload_seconds:
+            self.reload()
+        elif now - self._last_sync >= self.sync_seconds:
+            self._sync()
+        if jti not in self._bloom:
+            return False
+        return jti in self._exact
+
+    def revoke(self, jti, user_id=None, expires_at=None):
+        """Persists the revocation (committing the session) and adds it to the local index."""
+        if not db.session.query(RevokedToken.id).filter_by(jti=jti).first():
+            db.session.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Revoked concurrently by another request (unique jti): already done
+                db.session.rollback()
+        with self._lock:
+            self._add_local(jti)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "revoked_tokens": len(self._exact),
+                "bloom_bits": self._bloom.num_bits,
+                "bloom_hashes": self._bloom.num_hashes,
+                "synced_through": self._synced_through.isoformat() if self._synced_through else None,
+            }
+
+
+revocation_index = RevocationIndex()
+
+
+def expires_at_from_payload(jwt_payload):
+    exp = jwt_payload.get("exp")
+    return datetime.fromtimestamp(exp, tz=timezone.utc).replace(tzinfo=None) if exp else None
+
+
+def latest_expiry():
+    """When an access token issued now would expire (None if access tokens never expire)."""
+    expires = current_app.config.get("JWT_ACCESS_TOKEN_EXPIRES")
+    if not expires:
+        return None
+    if not isinstance(expires, timedelta):
+        expires = timedelta(seconds=expires)
+    return datetime.utcnow() + expires
+
+
+@click.group(name='tokens')
+def tokens_cli():
+    """Commands to manage revoked tokens."""
+    pass
+
+@tokens_cli.command("purge-expired")
+@with_appcontext
+def purge_expired_tokens():
+    """Deletes revocation rows for tokens that have already expired and reloads the index."""
+    deleted = RevokedToken.query.filter(RevokedToken.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+    revocation_index.reload()
+    click.echo(f"Purged {deleted} expired revoked token(s).")
+
+
+def register_revocation_commands(app):
+    """Registers token revocation commands with the Flask application."""
+    app.cli.add_command(tokens_cli)
@@ -0,0 +1,130 @@
+"""
+Role claims carried in access tokens (opt-in via JWT_ROLE_CLAIMS).
+
+When enabled, `login` embeds the user's system role, company roles, owned companies and
+membership version in the token. Authorization then trusts those claims as long as the
+version still matches User.membership_version, which is bumped in the same transaction as any
+CompanyUser insert/update/delete, a system role change or the deletion of an owned company.
+A stale token simply falls back to the database path, so a re-login picks up the new roles.
+"""
+from flask import current_app
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session, object_session
+from src.extensions import db
+from src.models.user import User
+from src.models.company import Company
+from src.models.company_user import CompanyUser
+from src.models.enums import RoleEnum, CompanyRoleEnum
+from src.utils.cache import LRUCache
+
+# user_id -> current membership_version. Invalidated locally on commit; the short TTL bounds how long
+# another worker process can keep trusting a token after a change made elsewhere.
+membership_versions = LRUCache(max_entries=10000, ttl_seconds=30)
+
+
+def role_claims_enabled():
+    return current_app.config.get("JWT_ROLE_CLAIMS", False)
+
+
+def build_role_claims(user):
+    """Returns the additional claims for `user`'s access token: system role, company roles, owned companies, version."""
+    memberships = db.session.query(CompanyUser.company_id, CompanyUser.role_in_company).filter_by(user_id=user.id).all()
+    owned_ids = [company_id for (company_id,) in db.session.query(Company.id).filter_by(owner_id=user.id).all()]
+    return {
+        "sr": user.role.value,
+        "cr": {str(company_id): role.value for company_id, role in memberships},
+        "oc": owned_ids,
+        "mv": user.membership_version or 0,
+    }
+
+
+def current_membership_version(user_id):
+    version = membership_versions.get(user_id)
+    if version is None:
+        version = db.session.query(User.membership_version).filter_by(id=user_id).scalar()
+        if version is not None:
+            membership_versions.set(user_id, version)
+    return version
+
+
+def _fresh_claims(user_id):
+    """Returns the role claims of the current token, or None if disabled, absent or stale."""
+    if not role_claims_enabled():
+        return None
+    claims = get_jwt()
+    if "mv" not in claims:
+        return None
+    if claims["mv"] != current_membership_version(user_id):
+        return None
+    return claims
+
+
+def system_role_from_claims(user_id):
+    claims = _fresh_claims(user_id)
+    return RoleEnum(claims["sr"]) if claims else None
+
+
+def access_from_claims(user_id, company_id):
+    """
+    Builds a CompanyAccess from the token claims if they are fresh and the user owns or belongs to the company.
+    Returns None otherwise, so that denials and 404s keep going through the database path.
+    """
+    claims = _fresh_claims(user_id)
+    if not claims:
+        return None
+    is_owner = company_id in claims.get("oc", [])
+    role_value = claims.get("cr", {}).get(str(company_id))
+    if not is_owner and role_value is None:
+        return None
+    from src.decorators.auth_decorators import CompanyAccess # Local import, the decorators module imports this one
+    return CompanyAccess(
+        user_id=user_id,
+        company_id=company_id,
+        system_role=RoleEnum(claims["sr"]),
+        owner_id=user_id if is_owner else None,
+        role_in_company=CompanyRoleEnum(role_value) if role_value else None,
+    )
+
+
+# --- Version bumps ---
+
+def _bump(connection, target, user_id):
+    if user_id is None:
+        return
+    connection.execute(
+        update(User.__table__).where(User.__table__.c.id == user_id)
+        .values(membership_version=User.__table__.c.membership_version + 1)
+    )
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("membership_changed", set()).add(user_id)
+
+
+@event.listens_for(CompanyUser, "after_insert")
+@event.listens_for(CompanyUser, "after_update")
+@event.listens_for(CompanyUser, "after_delete")
+def _company_user_changed(mapper, connection, target):
+    _bump(connection, target, target.user_id)
+
+
+@event.listens_for(Company, "after_delete")
+def _company_deleted(mapper, connection, target):
+    _bump(connection, target, target.owner_id)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    if db.inspect(target).attrs.role.history.has_changes():
+        _bump(connection, target, target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_versions(session):
+    for user_id in session.info.pop("membership_changed", ()):
+        membership_versions.delete(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_versions(session):
+    session.info.pop("membership_changed", None)
@@ -0,0 +1,162 @@
+"""
+Full-text search over expenses, income, invoices and inventory items (SQLite FTS5).
+
+All entities share one FTS5 table, `search_index`. The rowid encodes the entity type and id
+(id * 8 + type code), so the index row for a record is updated or deleted by rowid without
+scanning. Each row carries a `company_key` token (e.g. "c42") so that the company restriction
+is part of the MATCH expression and served by the full-text index as well.
+
+The index is kept in sync by ORM flush events, in the same transaction as the write;
+`flask search rebuild` repopulates it from the base tables.
+"""
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import DDL, event, text
+from src.extensions import db
+from src.models.expense import Expense
+from src.models.income import Income
+from src.models.invoice import Invoice
+from src.models.inventory_item import InventoryItem
+
+SEARCH_TABLE = "search_index"
+
+CREATE_SEARCH_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "company_key, title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+TITLE_COLUMN, BODY_COLUMN = 1, 2 # Column indexes, for snippet()
+
+# entity type -> (type code, model, title column, body columns)
+ENTITIES = {
+    "expense": (1, Expense, "description", ("vendor", "notes")),
+    "income": (2, Income, "description", ("notes",)),
+    "invoice": (3, Invoice, "customer_name", ("invoice_number", "notes")),
+    "inventory_item": (4, InventoryItem, "name", ("sku", "description")),
+}
+TYPE_BY_CODE = {code: entity_type for entity_type, (code, *_rest) in ENTITIES.items()}
+TYPE_BITS = 8
+
+
+# Created alongside the other tables by db.create_all(); migrations create it explicitly
+event.listen(db.metadata, "after_create", DDL(CREATE_SEARCH_TABLE).execute_if(dialect="sqlite"))
+
+
+def search_supported(bind):
+    return bind.dialect.name == "sqlite"
+
+
+def _rowid(code, entity_id):
+    return entity_id * TYPE_BITS + code
+
+
+def _document(target, title_attr, body_attrs):
+    title = getattr(target, title_attr) or ""
+    body = " ".join(str(getattr(target, attr)) for attr in body_attrs if getattr(target, attr))
+    return title, body
+
+
+def _make_listeners(code, model, title_attr, body_attrs):
+    def upsert(mapper, connection, target):
+        if not search_supported(connection):
+            return
+        title, body = _document(target, title_attr, body_attrs)
+        rowid = _rowid(code, target.id)
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {"rowid": rowid})
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, company_key, title, body) VALUES (:rowid, :company_key, :title, :body)"),
+            {"rowid": rowid, "company_key": f"c{target.company_id}", "title": title, "body": body},
+        )
+
+    def delete(mapper, connection, target):
+        if not search_supported(connection):
+            return
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {"rowid": _rowid(code, target.id)})
+
+    event.listen(model, "after_insert", upsert)
+    event.listen(model, "after_update", upsert)
+    event.listen(model, "after_delete", delete)
+
+
+for _code, _model, _title_attr, _body_attrs in ENTITIES.values():
+    _make_listeners(_code, _model, _title_attr, _body_attrs)
+
+
+def build_match_expression(company_id, q):
+    """
+    Turns free text into a safe FTS5 expression: every word must match (the last one as a prefix),
+    in the title or body, within the given company.
+    """
+    words = re.findall(r"\w+", q, flags=re.UNICODE)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return f'company_key:"c{company_id}" AND {{title body}}:({" ".join(terms)})'
+
+
+def search(company_id, q, types=None, limit=20):
+    """Returns ranked matches as dicts: type, id, title, snippet, rank."""
+    match = build_match_expression(company_id, q)
+    if match is None:
+        return []
+    type_filter = ""
+    params = {"match": match, "limit": limit}
+    if types:
+        codes = [ENTITIES[t][0] for t in types]
+        type_filter = f" AND (rowid % {TYPE_BITS}) IN ({', '.join(str(c) for c in codes)})"
+    # Snippets of explicit columns: with -1, FTS5 picks the column with the most matches, which is
+    # always company_key (every expression matches it)
+    rows = db.session.execute(text(
+        f"SELECT rowid, title, snippet({SEARCH_TABLE}, {BODY_COLUMN}, '[', ']', '...', 12) AS body_snippet, "
+        f"snippet({SEARCH_TABLE}, {TITLE_COLUMN}, '[', ']', '...', 12) AS title_snippet, bm25({SEARCH_TABLE}) AS rank "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match{type_filter} ORDER BY rank LIMIT :limit"
+    ), params).all()
+    return [
+        {
+            "type": TYPE_BY_CODE[row.rowid % TYPE_BITS],
+            "id": row.rowid // TYPE_BITS,
+            "title": row.title,
+            "snippet": row.body_snippet if "[" in (row.body_snippet or "") else row.title_snippet, # The body, unless only the title matched
+            "rank": row.rank,
+        }
+        for row in rows
+    ]
+
+
+def rebuild_search_index():
+    """Recreates the FTS table and repopulates it from the base tables with INSERT ... SELECT."""
+    db.session.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+    db.session.execute(text(CREATE_SEARCH_TABLE))
+    counts = {}
+    for entity_type, (code, model, title_attr, body_attrs) in ENTITIES.items():
+        table = model.__tablename__
+        body_sql = " || ' ' || ".join(f"COALESCE({attr}, '')" for attr in body_attrs)
+        result = db.session.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, company_key, title, body) "
+            f"SELECT id * {TYPE_BITS} + {code}, 'c' || company_id, COALESCE({title_attr}, ''), {body_sql} FROM {table}"
+        ))
+        counts[entity_type] = result.rowcount
+    db.session.commit()
+    return counts
+
+
+@click.group(name='search')
+def search_cli():
+    """Commands to manage the full-text search index."""
+    pass
+
+@search_cli.command("rebuild")
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuilds the full-text search index from the base tables."""
+    if not search_supported(db.engine):
+        click.echo("Full-text search requires SQLite FTS5; nothing to rebuild.")
+        return
+    counts = rebuild_search_index()
+    click.echo("Search index rebuilt: " + ", ".join(f"{count} {entity_type}" for entity_type, count in counts.items()))
+
+
+def register_search_commands(app):
+    """Registers search index commands with the Flask application."""
+    app.cli.add_command(search_cli)
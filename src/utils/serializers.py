@@ -0,0 +1,131 @@
+"""
+Column-driven serializers for API records.
+
+`serializer_for(model, fields)` returns a function, generated once per model / field list, that turns
+anything exposing the columns as attributes (ORM instances, Row tuples from column-only queries,
+`__slots__` objects) into the same dict as the model's to_dict. The encoder of each field is chosen
+from its column type up front instead of per value. When the app's JSON provider encodes dates,
+datetimes and enums natively (orjson, see src/utils/json_provider.py), values are passed through
+untouched and the encoding happens in the provider.
+"""
+import random
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from src.extensions import db
+
+
+# Column type -> expression template applied to the (non-null) value
+_ISOFORMAT = "{v}.isoformat()"
+_ENUM_VALUE = "{v}.value"
+
+
+def _compile(fields, encoders):
+    """
+    Generates a function returning the record as a dict literal, e.g. for Expense:
+        def serialize(obj):
+            v3 = obj.date_incurred
+            return {"id": obj.id, ..., "date_incurred": v3.isoformat() if v3 is not None else None, ...}
+    so serializing a row costs one attribute read per field and no per-value type checks.
+    """
+    lines, items = [], []
+    for i, name in enumerate(fields):
+        template = encoders.get(name)
+        if template is None:
+            items.append(f"{name!r}: obj.{name}")
+        else:
+            lines.append(f"    v{i} = obj.{name}")
+            items.append(f"{name!r}: {template.format(v=f'v{i}')} if v{i} is not None else None")
+    source = "def serialize(obj):\n" + "\n".join(lines) + ("\n" if lines else "") + "    return {" + ", ".join(items) + "}\n"
+    namespace = {}
+    exec(compile(source, "<serializer>", "exec"), namespace)
+    serialize = namespace["serialize"]
+    serialize.fields = tuple(fields)
+    serialize.many = lambda objs: list(map(serialize, objs))
+    return serialize
+
+
+_registry = {}
+
+
+def native_json():
+    """True if the current app's JSON provider encodes dates, datetimes and enums itself."""
+    return has_app_context() and getattr(current_app.json, "native_types", False)
+
+
+def _column_encoder(column):
+    if isinstance(column.type, (db.Date, db.DateTime)):
+        return _ISOFORMAT
+    if isinstance(column.type, db.Enum):
+        return _ENUM_VALUE
+    return None
+
+
+def serializer_for(model, fields=None, native=None):
+    """
+    Returns the cached serializer function for `model` (with `.fields` and `.many(objs)`).
+    - fields: column names to include, in order; defaults to the model's API_FIELDS columns (or all columns).
+    - native: leave dates/datetimes/enums for the JSON provider; defaults to what the current app's provider supports.
+    """
+    if native is None:
+        native = native_json()
+    columns = model.__table__.columns
+    if fields is None:
+        fields = [name for name in getattr(model, "API_FIELDS", columns.keys()) if name in columns]
+    key = (model, tuple(fields), native)
+    serializer = _registry.get(key)
+    if serializer is None:
+        encoders = {} if native else {name: _column_encoder(columns[name]) for name in fields}
+        serializer = _registry[key] = _compile(fields, encoders)
+    return serializer
+
+
+@click.group(name='serialization')
+def serialization_cli():
+    """Commands for API serialization."""
+    pass
+
+@serialization_cli.command("benchmark")
+@click.option("--rows", default=20000, show_default=True, help="Number of records to serialize.")
+@click.option("--repeat", default=3, show_default=True, help="Runs per variant; the best one is reported.")
+@with_appcontext
+def benchmark_serialization(rows, repeat):
+    """Compares to_dict + stdlib json with the column serializers and the app's JSON provider."""
+    import json
+    from src.models.expense import Expense
+
+    start = date(2020, 1, 1)
+    expenses = [
+        Expense(id=i, description=f"Expense {i}", amount=round(random.uniform(1, 5000), 2), date_incurred=start + timedelta(days=i % 1500),
+                category="Travel", vendor="Acme", notes=None, created_at=datetime(2024, 1, 1, 12, 0, i % 60), user_id=1, company_id=1)
+        for i in range(rows)
+    ]
+    # Column-only rows, as returned by projected queries (?fields=, row_to_dict)
+    fields = serializer_for(Expense).fields
+    ExpenseRow = namedtuple("ExpenseRow", fields)
+    expense_rows = [ExpenseRow(*(getattr(e, name) for name in fields)) for e in expenses]
+    provider = current_app.json
+
+    variants = {
+        "to_dict + stdlib json": lambda: json.dumps([e.to_dict() for e in expenses], separators=(",", ":")),
+        "serializer + stdlib json": lambda: json.dumps(serializer_for(Expense, native=False).many(expenses), separators=(",", ":")),
+        f"serializer + {type(provider).__name__}": lambda: provider.dumps(serializer_for(Expense).many(expenses)),
+        f"rows + serializer + {type(provider).__name__}": lambda: provider.dumps(serializer_for(Expense).many(expense_rows)),
+    }
+    for name, run in variants.items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        click.echo(f"{name:<42} {rows / best:12.0f} records/s ({best * 1000:.1f} ms for {rows})")
+
+
+def register_serialization_commands(app):
+    """Registers serialization commands with the Flask application."""
+    app.cli.add_command(serialization_cli)
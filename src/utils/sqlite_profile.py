@@ -0,0 +1,148 @@
+"""
+SQLite connection profile.
+
+The PRAGMAs of the selected profile are applied to every new connection through the engine's
+`connect` event. "production" switches the database to WAL, so readers no longer block the writer
+(and the writer no longer blocks readers), syncs at checkpoints instead of every commit
+(synchronous=NORMAL: durable across application crashes, not across power loss), memory-maps the
+file, enlarges the page cache, keeps temporary b-trees in memory and makes writers wait for the
+lock instead of failing with "database is locked".
+Selected with SQLITE_PROFILE (production or none); the sizes and timeout have their own settings.
+"""
+import os
+import tempfile
+import threading
+import time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from src.extensions import db
+
+PROFILES = {
+    "none": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024, # Negative: KiB rather than pages
+        "busy_timeout": 5000, # Milliseconds
+    },
+}
+
+
+def profile_pragmas(name, mmap_size=None, cache_size_kib=None, busy_timeout_ms=None):
+    """The PRAGMAs of profile `name`, with the given sizes/timeout overriding the profile's."""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{name}'. Supported profiles are: {', '.join(PROFILES)}.")
+    pragmas = dict(PROFILES[name])
+    if mmap_size is not None:
+        pragmas["mmap_size"] = mmap_size
+    if cache_size_kib is not None:
+        pragmas["cache_size"] = -cache_size_kib
+    if busy_timeout_ms is not None:
+        pragmas["busy_timeout"] = busy_timeout_ms
+    return pragmas
+
+
+def apply_pragmas(engine, pragmas):
+    """Runs the PRAGMAs on every new connection of `engine`."""
+    if not pragmas:
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    event.listen(engine, "connect", on_connect)
+
+
+def init_sqlite_profile(app):
+    """Applies the configured profile to the app's engine, if it is SQLite."""
+    pragmas = profile_pragmas(app.config.setdefault("SQLITE_PROFILE", "production"),
+                              mmap_size=app.config.setdefault("SQLITE_MMAP_SIZE", None),
+                              cache_size_kib=app.config.setdefault("SQLITE_CACHE_SIZE_KIB", None),
+                              busy_timeout_ms=app.config.setdefault("SQLITE_BUSY_TIMEOUT_MS", None))
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            apply_pragmas(db.engine, pragmas)
+
+
+def _run_load(engine, seconds, readers, writers):
+    """Runs reader and writer threads against `engine` for `seconds`; returns (reads, writes, lock errors)."""
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(n):
+        with engine.connect() as connection:
+            while time.monotonic() < deadline:
+                try:
+                    connection.execute(text("SELECT SUM(amount), COUNT(*) FROM bench WHERE company_id = :c"), {"c": n % 4 + 1}).one()
+                    connection.rollback()
+                    count("reads")
+                except OperationalError:
+                    connection.rollback()
+                    count("locked")
+
+    def writer(n):
+        with engine.connect() as connection:
+            i = 0
+            while time.monotonic() < deadline:
+                try:
+                    connection.execute(text("INSERT INTO bench (company_id, day, amount) VALUES (:c, :d, :a)"),
+                                       {"c": n % 4 + 1, "d": f"2024-01-{i % 28 + 1:02d}", "a": i * 0.5})
+                    connection.commit()
+                    count("writes")
+                except OperationalError:
+                    connection.rollback()
+                    count("locked")
+                i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts["reads"], counts["writes"], counts["locked"]
+
+
+@click.group(name='sqlite')
+def sqlite_cli():
+    """Commands for the SQLite connection profile."""
+    pass
+
+@sqlite_cli.command("benchmark")
+@click.option("--seconds", default=3.0, show_default=True, help="Duration per profile.")
+@click.option("--readers", default=4, show_default=True, help="Concurrent reader threads (report-style aggregates).")
+@click.option("--writers", default=4, show_default=True, help="Concurrent writer threads (one insert per transaction).")
+@click.option("--rows", default=50000, show_default=True, help="Rows in the table before the run.")
+@with_appcontext
+def benchmark_sqlite_profiles(seconds, readers, writers, rows):
+    """Compares reads/s, writes/s and lock errors of each profile on a scratch database file."""
+    for name in PROFILES:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            apply_pragmas(engine, profile_pragmas(name))
+            with engine.begin() as connection:
+                connection.execute(text("CREATE TABLE bench (id INTEGER PRIMARY KEY, company_id INTEGER NOT NULL, day TEXT NOT NULL, amount REAL NOT NULL)"))
+                connection.execute(text("CREATE INDEX ix_bench_company_day ON bench (company_id, day)"))
+                connection.execute(text("INSERT INTO bench (company_id, day, amount) VALUES (:c, :d, :a)"),
+                                   [{"c": i % 4 + 1, "d": f"2023-{i % 12 + 1:02d}-01", "a": float(i % 1000)} for i in range(rows)])
+            reads, writes, locked = _run_load(engine, seconds, readers, writers)
+            engine.dispose()
+        click.echo(f"{name:<12} {reads / seconds:10.1f} reads/s {writes / seconds:10.1f} writes/s {locked:6d} 'database is locked' errors")
+
+
+def register_sqlite_commands(app):
+    """Registers SQLite profile commands with the Flask application."""
+    app.cli.add_command(sqlite_cli)
@@ -0,0 +1,48 @@
+"""
+NDJSON streaming for large collections and reports.
+
+Selected with `Accept: application/x-ndjson` or `?stream=1`. Rows are read from the database in
+batches with `yield_per` and each record is written to the socket as one JSON line as soon as it
+is serialized, so memory stays flat regardless of the result size.
+"""
+import json
+from functools import partial
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_ndjson():
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def iter_query(query):
+    """Iterates a query in batches instead of loading every row at once."""
+    return query.yield_per(STREAM_BATCH_SIZE)
+
+
+def iter_batches(iterable, size=STREAM_BATCH_SIZE):
+    """Groups an iterable into lists of up to `size` items, e.g. to load related rows per batch."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_response(records, status=200):
+    """Streams an iterable of JSON-serializable records, one per line."""
+    # The app's provider when it encodes dates/enums natively (orjson), otherwise compact stdlib json
+    dumps = current_app.json.dumps if getattr(current_app.json, "native_types", False) else partial(json.dumps, separators=(",", ":"), default=str)
+
+    def generate():
+        for record in records:
+            yield dumps(record) + "\n"
+    return Response(stream_with_context(generate()), status=status, mimetype=NDJSON_MIMETYPE)
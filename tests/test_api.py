@@ -0,0 +1,186 @@
+"""
+API tests that run unchanged on every supported backend (see TEST_DATABASE_URL in conftest.py).
+"""
+import time
+
+import pytest
+
+from conftest import auth
+from src.extensions import report_cache
+from src.utils.aggregates import rebuild_aggregates
+
+YEAR = "start_date=2024-01-01&end_date=2024-12-31"
+
+
+@pytest.fixture
+def api(client, company, owner):
+    """api(method, path, **kwargs): a request to /api/companies/<company>/<path> as the owner."""
+    def request(method, path, **kwargs):
+        return client.open(f"/api/companies/{company}/{path}", method=method, headers=auth(owner[1]), **kwargs)
+    return request
+
+
+@pytest.fixture
+def ledger(api):
+    """Income, expenses, inventory, invoices and salaries spread over 2024."""
+    for month, amount, category in [(1, 100.0, "Sales"), (1, 50.0, None), (2, 200.0, "Sales"), (5, 75.0, "Services")]:
+        response = api("POST", "income", json={"description": f"Income {month}", "amount": amount,
+                                                 "date_received": f"2024-{month:02d}-10", "category": category})
+        assert response.status_code == 201, response.json
+    for month, amount, category, vendor in [(1, 40.0, "Rent", "Landlord"), (3, 60.0, "Rent", "Landlord"), (3, 15.0, None, "Cafe")]:
+        response = api("POST", "expenses", json={"description": f"Expense {month}", "amount": amount,
+                                                   "date_incurred": f"2024-{month:02d}-05", "category": category, "vendor": vendor})
+        assert response.status_code == 201, response.json
+    for name, quantity, unit in [("Widget", 10, "piece"), ("Gadget", 0, "piece"), ("Cable", 5, "meter")]:
+        response = api("POST", "inventory", json={"name": name, "sale_price": 10.0, "purchase_price": 4.0,
+                                                    "quantity_on_hand": quantity, "unit_of_measure": unit})
+        assert response.status_code == 201, response.json
+    response = api("POST", "invoices", json={"customer_name": "Initech", "issue_date": "2024-02-01",
+                                               "items": [{"item_description": "Consulting", "quantity": 2, "unit_price": 150.0}]})
+    assert response.status_code == 201, response.json
+    employee_id = api("POST", "employees", json={"first_name": "Ada", "last_name": "Lovelace"}).json["id"]
+    for payment_date in ("2024-01-31", "2024-02-29", "2023-12-31"):
+        response = api("POST", f"employees/{employee_id}/salaries", json={"gross_amount": 1000.0, "deductions": 200.0, "payment_date": payment_date})
+        assert response.status_code == 201, response.json
+    return {"employee_id": employee_id}
+
+
+def test_income_crud(api):
+    created = api("POST", "income", json={"description": "Consulting", "amount": 120.5, "date_received": "2024-03-01", "category": "Services"})
+    assert created.status_code == 201
+    income_id = created.json["id"]
+    assert api("GET", f"income/{income_id}").json["amount"] == 120.5
+
+    updated = api("PUT", f"income/{income_id}", json={"amount": 99.0, "notes": "Discounted"})
+    assert updated.status_code == 200
+    assert (updated.json["amount"], updated.json["notes"]) == (99.0, "Discounted")
+
+    assert [item["id"] for item in api("GET", "income?category=Services").json["items"]] == [income_id]
+    assert api("GET", "income?category=Other").json["items"] == []
+    assert api("DELETE", f"income/{income_id}").status_code in (200, 204)
+    assert api("GET", f"income/{income_id}").status_code == 404
+
+
+def test_list_pages_with_a_keyset_cursor(api):
+    for day in range(1, 8):
+        api("POST", "expenses", json={"description": f"Expense {day}", "amount": 1.0, "date_incurred": f"2024-04-{day:02d}"})
+    seen, cursor = [], None
+    while True:
+        page = api("GET", "expenses?limit=3" + (f"&cursor={cursor}" if cursor else "")).json
+        seen += [item["date_incurred"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [f"2024-04-{day:02d}" for day in range(7, 0, -1)]
+
+
+def test_invoice_with_items(api):
+    created = api("POST", "invoices", json={"customer_name": "Globex", "issue_date": "2024-06-01",
+                                              "items": [{"item_description": "A", "quantity": 3, "unit_price": 5.0},
+                                                        {"item_description": "B", "quantity": 1, "unit_price": 2.5}]})
+    assert created.status_code == 201, created.json
+    invoice = api("GET", f"invoices/{created.json['id']}").json
+    assert invoice["total_amount"] == 17.5
+    assert [item["item_description"] for item in invoice["items"]] == ["A", "B"]
+    assert api("PUT", f"invoices/{invoice['id']}", json={"status": "Paid"}).json["status"] == "Paid"
+
+
+def test_unique_constraints(client, api, company, owner, make_user):
+    assert api("POST", "inventory", json={"name": "Widget", "sale_price": 1.0, "sku": "W-1"}).status_code == 201
+    assert api("POST", "inventory", json={"name": "Widget", "sale_price": 1.0}).status_code == 409
+    assert api("POST", "inventory", json={"name": "Other", "sale_price": 1.0, "sku": "W-1"}).status_code == 409
+    response = client.post("/api/register", json={"username": "owner", "email": "new@example.com", "password": "secret123"})
+    assert response.status_code == 400
+
+    member_id, _ = make_user("member")
+    assert api("POST", "users", json={"user_id": member_id, "role_in_company": "viewer"}).status_code == 201
+    assert api("POST", "users", json={"user_id": member_id, "role_in_company": "editor"}).status_code == 200
+    assert [(m["user_id"], m["role_in_company"]) for m in api("GET", "users").json["items"] if m["user_id"] == member_id] == [(member_id, "editor")]
+
+
+def test_profit_and_loss(api, ledger):
+    report = api("GET", f"reports/profit_and_loss?{YEAR}").json
+    assert (report["total_income"], report["total_expenses"], report["net_profit_loss"]) == (425.0, 115.0, 310.0)
+
+
+@pytest.mark.parametrize("granularity, buckets", [
+    ("day", {"2024-01-05": (0.0, 40.0), "2024-01-10": (150.0, 0.0), "2024-03-05": (0.0, 75.0)}),
+    ("week", {"2024-01-01": (0.0, 40.0), "2024-01-08": (150.0, 0.0), "2024-03-04": (0.0, 75.0)}),
+    ("month", {"2024-01-01": (150.0, 40.0), "2024-02-01": (200.0, 0.0), "2024-03-01": (0.0, 75.0), "2024-05-01": (75.0, 0.0)}),
+    ("quarter", {"2024-01-01": (350.0, 115.0), "2024-04-01": (75.0, 0.0)}),
+    ("year", {"2024-01-01": (425.0, 115.0)}),
+])
+def test_profit_and_loss_series(api, ledger, granularity, buckets):
+    report = api("GET", f"reports/profit_and_loss?{YEAR}&granularity={granularity}").json
+    series = {bucket["period_start"]: (bucket["income"], bucket["expenses"]) for bucket in report["series"]}
+    for start, totals in buckets.items():
+        assert series[start] == totals
+    assert (report["total_income"], report["total_expenses"]) == (425.0, 115.0)
+
+
+def test_expense_report(api, ledger):
+    report = api("GET", f"reports/expense_report?{YEAR}").json
+    assert (report["total_expenses"], report["number_of_expenses"]) == (115.0, 3)
+    by_category = {group["category"]: group["total_amount"] for group in report["breakdowns"]["by_category"]}
+    assert by_category == {"Rent": 100.0, None: 15.0}
+    by_vendor = {group["vendor"]: group["count"] for group in report["breakdowns"]["by_vendor"]}
+    assert by_vendor == {"Landlord": 2, "Cafe": 1}
+    assert len(report["expense_details"]) == 3
+
+
+def test_sales_report(api, ledger):
+    report = api("GET", f"reports/sales_report?{YEAR}").json
+    assert (report["total_sales_amount"], report["number_of_invoices"]) == (300.0, 1)
+    assert report["invoices"][0]["items"][0]["line_total"] == 300.0
+
+
+@pytest.mark.parametrize("group_by, groups", [
+    ("stock_status", {"in_stock": 2, "out_of_stock": 1}),
+    ("unit_of_measure", {"piece": 2, "meter": 1}),
+])
+def test_inventory_summary_groups(api, ledger, group_by, groups):
+    report = api("GET", f"reports/inventory_summary?group_by={group_by}").json
+    assert report["total_inventory_value_at_cost"] == 60.0
+    assert report["total_inventory_value_at_sale_price"] == 150.0
+    assert {group["group"]: group["number_of_items"] for group in report["groups"]} == groups
+
+
+@pytest.mark.parametrize("query", ["year=2024", "start_date=2024-01-01&end_date=2024-06-30"]) # Rollup / GROUP BY
+def test_payroll_by_employee(api, ledger, query):
+    report = api("GET", f"reports/employee_payroll?{query}&group_by=employee").json
+    [employee] = report["employees"]
+    assert (employee["total_gross_pay"], employee["total_net_pay"], employee["count"]) == (2000.0, 1600.0, 2)
+    assert api("GET", f"reports/employee_payroll?year=2023&group_by=employee").json["employees"][0]["count"] == 1
+
+
+def test_rebuilt_aggregates_match_incremental_ones(app, api, company, ledger):
+    reports = [f"reports/profit_and_loss?{YEAR}&granularity=month", f"reports/expense_report?{YEAR}",
+               "reports/employee_payroll?year=2024&group_by=employee"]
+    before = [api("GET", path).json for path in reports]
+    with app.app_context():
+        counts = rebuild_aggregates()
+    assert counts == {"daily_income_agg": 4, "daily_expense_agg": 3, "employee_payroll_years": 2}
+    with app.app_context():
+        assert rebuild_aggregates(company) == counts
+    report_cache.clear()
+    assert [api("GET", path).json for path in reports] == before
+
+
+def test_report_job(api, ledger):
+    created = api("POST", f"reports/profit_and_loss/jobs?{YEAR}")
+    assert created.status_code == 202
+    job_url = created.headers["Location"].split("/companies/", 1)[1].split("/", 1)[1]
+    for _ in range(100):
+        job = api("GET", job_url).json
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.05)
+    assert job["status"] == "succeeded", job
+    result = api("GET", f"{job_url}/result")
+    assert result.status_code == 200
+    assert result.json["net_profit_loss"] == 310.0
+
+
+def test_deleting_a_company_deletes_its_records(client, api, company, owner, ledger):
+    assert client.delete(f"/api/companies/{company}", headers=auth(owner[1])).status_code in (200, 204)
+    assert client.get(f"/api/companies/{company}", headers=auth(owner[1])).status_code == 404
@@ -0,0 +1,46 @@
+import pytest
+
+from conftest import auth
+from src.extensions import access_cache
+
+COMPANY_SCOPED_GETS = ["income", "expenses", "invoices", "inventory", "employees", "reports/inventory_summary"]
+
+
+def authorization_queries(statements):
+    # load_company_access: one SELECT joining users, companies and company_users
+    return [s for s in statements if "company_users" in s]
+
+
+@pytest.fixture
+def viewer(client, company, owner, make_user):
+    user_id, token = make_user("viewer")
+    response = client.post(f"/api/companies/{company}/users", json={"user_id": user_id, "role_in_company": "viewer"}, headers=auth(owner[1]))
+    assert response.status_code == 201, response.json
+    return user_id, token
+
+
+@pytest.mark.parametrize("path", COMPANY_SCOPED_GETS)
+@pytest.mark.parametrize("who", ["owner", "viewer"])
+def test_company_scoped_get_runs_one_authorization_query(client, company, owner, viewer, queries, path, who):
+    access_cache.clear()
+    token = {"owner": owner, "viewer": viewer}[who][1]
+    queries.clear()
+    response = client.get(f"/api/companies/{company}/{path}", headers=auth(token))
+    assert response.status_code == 200, response.json
+    assert len(authorization_queries(queries)) == 1
+
+    # Served from the access cache afterwards
+    queries.clear()
+    assert client.get(f"/api/companies/{company}/{path}", headers=auth(token)).status_code == 200
+    assert authorization_queries(queries) == []
+
+
+def test_non_member_is_rejected_after_one_query(client, company, make_user, queries):
+    _, token = make_user("outsider")
+    queries.clear()
+    assert client.get(f"/api/companies/{company}/income", headers=auth(token)).status_code == 403
+    assert len(authorization_queries(queries)) == 1
+
+
+def test_unknown_company_is_not_found(client, owner):
+    assert client.get("/api/companies/999999/income", headers=auth(owner[1])).status_code == 404
@@ -0,0 +1,62 @@
+"""
+Per-process caches must not serve a deleted company's data to a new company that reuses its id
+(SQLite hands out the highest deleted rowid again).
+"""
+import pytest
+
+from conftest import auth
+from src.extensions import report_cache
+
+YEAR = "start_date=2024-01-01&end_date=2024-12-31"
+
+
+@pytest.fixture
+def reused_company(client, make_user, backend):
+    """reused_company(seed, read) -> (company_id, token): Alice's company is seeded, read, and deleted; Bob's new company gets the same id."""
+    def make(seed, read):
+        _, alice = make_user("alice")
+        alice_company = client.post("/api/companies/", json={"name": "Alice Ltd"}, headers=auth(alice)).json["id"]
+        seed(f"/api/companies/{alice_company}", alice)
+        read(f"/api/companies/{alice_company}", alice)
+        assert client.delete(f"/api/companies/{alice_company}", headers=auth(alice)).status_code in (200, 204)
+
+        _, bob = make_user("bob")
+        bob_company = client.post("/api/companies/", json={"name": "Bob Ltd"}, headers=auth(bob)).json["id"]
+        if bob_company != alice_company:
+            pytest.skip(f"{backend} did not reuse the company id")
+        return bob_company, bob
+    return make
+
+
+def test_inventory_valuation_is_not_served_across_a_reused_company_id(client, reused_company, monkeypatch):
+    monkeypatch.setattr(report_cache, "max_bytes", 0) # Only the valuation cache is in play
+
+    def seed(prefix, token):
+        client.post(f"{prefix}/inventory", json={"name": "Gold", "sale_price": 20000.0, "purchase_price": 10000.0, "quantity_on_hand": 1}, headers=auth(token))
+
+    def read(prefix, token):
+        assert client.get(f"{prefix}/reports/inventory_summary", headers=auth(token)).json["total_inventory_value_at_cost"] == 10000.0
+
+    company, bob = reused_company(seed, read)
+    client.post(f"/api/companies/{company}/inventory", json={"name": "Pencil", "sale_price": 2.0, "purchase_price": 1.0, "quantity_on_hand": 1}, headers=auth(bob))
+    assert client.get(f"/api/companies/{company}/reports/inventory_summary", headers=auth(bob)).json["total_inventory_value_at_cost"] == 1.0
+
+
+def test_reports_are_not_served_across_a_reused_company_id(client, reused_company):
+    def seed(prefix, token):
+        client.post(f"{prefix}/income", json={"description": "Big sale", "amount": 999.0, "date_received": "2024-03-01"}, headers=auth(token))
+
+    def read(prefix, token):
+        assert client.get(f"{prefix}/reports/profit_and_loss?{YEAR}", headers=auth(token)).json["total_income"] == 999.0
+
+    company, bob = reused_company(seed, read)
+    client.post(f"/api/companies/{company}/income", json={"description": "Small sale", "amount": 1.0, "date_received": "2024-03-01"}, headers=auth(bob))
+    assert client.get(f"/api/companies/{company}/reports/profit_and_loss?{YEAR}", headers=auth(bob)).json["total_income"] == 1.0
+
+
+def test_deleting_a_company_drops_its_cached_reports(client, company, owner):
+    client.get(f"/api/companies/{company}/reports/profit_and_loss?{YEAR}", headers=auth(owner[1]))
+    assert report_cache.stats()["entries"] == 1
+    client.delete(f"/api/companies/{company}", headers=auth(owner[1]))
+    assert report_cache.stats()["entries"] == 0
+    assert report_cache.stats()["bytes"] == 0
@@ -0,0 +1,125 @@
+import threading
+from datetime import date
+
+import pytest
+
+from conftest import auth
+from src.models.income import Income
+from src.utils.group_commit import GroupCommitBusy, GroupCommitQueue, group_commit
+
+
+@pytest.fixture
+def enabled_group_commit():
+    group_commit.configure(enabled=True, window_ms=20, max_batch=64)
+    yield group_commit
+    group_commit.configure(enabled=False)
+
+
+@pytest.fixture
+def queue_(app):
+    queue_ = GroupCommitQueue()
+    queue_.init_app(app)
+    queue_.configure(enabled=True, window_ms=0)
+    return queue_
+
+
+def income(owner, company, description="Sale"):
+    return Income(description=description, amount=10.0, date_received=date(2024, 1, 2), category="Sales",
+                  user_id=owner[0], company_id=company)
+
+
+def test_concurrent_posts_share_commits(app, client, company, owner, enabled_group_commit):
+    statuses = []
+    lock = threading.Lock()
+
+    def post(n):
+        response = app.test_client().post(f"/api/companies/{company}/income", headers=auth(owner[1]), json={
+            "description": f"Sale {n}", "amount": 10.0, "date_received": "2024-01-02", "category": "Sales"})
+        with lock:
+            statuses.append((response.status_code, response.json["description"]))
+
+    batches = enabled_group_commit.batches
+    threads = [threading.Thread(target=post, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(statuses) == sorted((201, f"Sale {n}") for n in range(20))
+    assert enabled_group_commit.batches - batches < 20
+    with app.app_context():
+        assert Income.query.filter_by(company_id=company).count() == 20
+    report = client.get(f"/api/companies/{company}/reports/profit_and_loss?start_date=2024-01-01&end_date=2024-01-31", headers=auth(owner[1]))
+    assert report.json["total_income"] == 200.0
+
+
+def test_failing_record_fails_only_its_caller(app, company, owner, queue_):
+    with app.app_context():
+        assert queue_.insert(income(owner, company))["description"] == "Sale"
+        with pytest.raises(Exception):
+            queue_.insert(income(owner, company, description=None)) # NOT NULL
+        assert queue_.insert(income(owner, company, description="After"))["description"] == "After"
+        assert Income.query.filter_by(company_id=company).count() == 2
+
+
+def test_committer_survives_errors_outside_the_transaction(app, company, owner, queue_, monkeypatch):
+    original_commit = queue_._commit
+
+    def broken_connection(batch):
+        monkeypatch.setattr(queue_, "_commit", original_commit)
+        raise RuntimeError("connection lost during rollback")
+
+    monkeypatch.setattr(queue_, "_commit", broken_connection)
+    with app.app_context():
+        with pytest.raises(RuntimeError, match="connection lost"):
+            queue_.insert(income(owner, company))
+        assert queue_.insert(income(owner, company, description="After"))["description"] == "After"
+        assert [i.description for i in Income.query.filter_by(company_id=company)] == ["After"]
+
+
+def test_timeout_cancels_queued_records(app, company, owner, queue_, monkeypatch):
+    original_commit = queue_._commit
+    entered, release = threading.Event(), threading.Event()
+
+    def stuck(batch):
+        entered.set()
+        release.wait()
+        original_commit(batch)
+
+    monkeypatch.setattr(queue_, "_commit", stuck)
+    queue_.timeout = 0.2
+    errors = []
+
+    def insert_in_stuck_batch():
+        with app.app_context():
+            try:
+                queue_.insert(income(owner, company, description="Stuck"))
+            except GroupCommitBusy as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=insert_in_stuck_batch)
+    thread.start()
+    assert entered.wait(5)
+    with app.app_context():
+        with pytest.raises(GroupCommitBusy):
+            queue_.insert(income(owner, company, description="Cancelled")) # Still queued when it times out
+    release.set()
+    thread.join()
+    assert len(errors) == 1 # Already in the stuck batch: not cancellable, committed once the committer moves on
+
+    monkeypatch.setattr(queue_, "_commit", original_commit)
+    queue_.timeout = 5
+    with app.app_context():
+        assert queue_.insert(income(owner, company, description="After"))["description"] == "After"
+        assert sorted(i.description for i in Income.query.filter_by(company_id=company)) == ["After", "Stuck"]
+
+
+def test_timeout_is_answered_with_503(client, company, owner, monkeypatch):
+    def busy(record, serialize=None):
+        raise GroupCommitBusy()
+
+    monkeypatch.setattr(group_commit, "insert", busy)
+    response = client.post(f"/api/companies/{company}/income", headers=auth(owner[1]), json={
+        "description": "Sale", "amount": 10.0, "date_received": "2024-01-02"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
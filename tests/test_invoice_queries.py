@@ -0,0 +1,93 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from conftest import auth
+from src.extensions import db, access_cache, report_cache
+from src.models.invoice import Invoice, InvoiceItem
+
+NUMBER_OF_INVOICES = 1000
+
+
+@pytest.fixture
+def invoices(app, company, owner):
+    with app.app_context():
+        db.session.execute(insert(Invoice), [
+            {"invoice_number": f"INV-{n:05d}", "customer_name": f"Customer {n % 7}", "issue_date": date(2024, 1, 1) + timedelta(days=n % 300),
+             "total_amount": 30.0, "status": "Sent", "user_id": owner[0], "company_id": company}
+            for n in range(NUMBER_OF_INVOICES)
+        ])
+        invoice_ids = [invoice_id for (invoice_id,) in db.session.query(Invoice.id).filter_by(company_id=company)]
+        db.session.execute(insert(InvoiceItem), [
+            {"invoice_id": invoice_id, "item_description": f"Line {line}", "quantity": 1, "unit_price": 10.0 * line, "line_total": 10.0 * line}
+            for invoice_id in invoice_ids for line in (1, 2)
+        ])
+        db.session.commit()
+    return invoice_ids
+
+
+def measure(client, queries, url, token, **kwargs):
+    """Statements run by one request, after the authorization context is cached."""
+    access_cache.clear()
+    report_cache.clear()
+    client.get(url, headers=auth(token), **kwargs)
+    report_cache.clear()
+    queries.clear()
+    response = client.get(url, headers=auth(token), **kwargs)
+    assert response.status_code == 200
+    return response, list(queries)
+
+
+def item_queries(statements):
+    return [s for s in statements if "FROM invoice_items" in s]
+
+
+def test_invoice_page_loads_items_with_one_query(client, company, owner, invoices, queries):
+    response, statements = measure(client, queries, f"/api/companies/{company}/invoices?limit=500", owner[1])
+    assert len(response.json["items"]) == 500
+    assert all(len(invoice["items"]) == 2 for invoice in response.json["items"])
+    # Data version (ETag), the page, its line items
+    assert len(statements) == 3
+    assert len(item_queries(statements)) == 1
+
+
+def test_invoice_stream_loads_items_once_per_batch(client, company, owner, invoices, queries):
+    response, statements = measure(client, queries, f"/api/companies/{company}/invoices?stream=1", owner[1])
+    records = [json.loads(line) for line in response.data.splitlines()]
+    assert len(records) == NUMBER_OF_INVOICES
+    assert all(len(record["items"]) == 2 for record in records)
+    # Data version, the invoices, the line items of the single 1,000-row batch
+    assert len(statements) == 3
+    assert len(item_queries(statements)) == 1
+
+
+def test_sales_report_details_load_items_with_one_query(client, company, owner, invoices, queries):
+    url = f"/api/companies/{company}/reports/sales_report?start_date=2024-01-01&end_date=2024-12-31"
+    response, statements = measure(client, queries, url, owner[1])
+    assert response.json["number_of_invoices"] == NUMBER_OF_INVOICES
+    assert all(len(invoice["items"]) == 2 for invoice in response.json["invoices"])
+    # Data version, totals, two breakdowns, the details page, its line items
+    assert len(statements) == 6
+    assert len(item_queries(statements)) == 1
+
+
+def test_sales_report_stream_loads_items_once_per_batch(client, company, owner, invoices, queries):
+    url = f"/api/companies/{company}/reports/sales_report?start_date=2024-01-01&end_date=2024-12-31&stream=1"
+    response, statements = measure(client, queries, url, owner[1])
+    records = [json.loads(line) for line in response.data.splitlines()]
+    assert records[-1]["summary"]["number_of_invoices"] == NUMBER_OF_INVOICES
+    assert all(len(record["items"]) == 2 for record in records[:-1])
+    assert len(statements) == 3
+    assert len(item_queries(statements)) == 1
+
+
+def test_invoice_to_dicts_loads_items_with_one_query(app, invoices, queries):
+    with app.app_context():
+        batch = Invoice.query.filter(Invoice.id.in_(invoices)).all()
+        queries.clear()
+        records = Invoice.to_dicts(batch)
+    assert len(records) == NUMBER_OF_INVOICES
+    assert all(len(record["items"]) == 2 for record in records)
+    assert len(queries) == 1
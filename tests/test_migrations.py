@@ -0,0 +1,9 @@
+from flask_migrate import check
+
+from conftest import MIGRATIONS_DIR
+
+
+def test_models_match_the_migrations(app):
+    """Autogenerate finds nothing to add or drop (the FTS5 search tables included); check() exits on a difference."""
+    with app.app_context():
+        check(directory=MIGRATIONS_DIR)
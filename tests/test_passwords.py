@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from src.utils.passwords import PasswordHasher, PasswordHashingBusy
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1, max_queue=1, timeout=0.05)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify(hasher):
+    password_hash = hasher.hash("secret")
+    assert hasher.verify(password_hash, "secret")
+    assert not hasher.verify(password_hash, "other")
+    assert not hasher.needs_rehash(password_hash)
+
+
+def test_timeout_is_busy_and_keeps_the_slot_until_the_hash_ends(hasher):
+    release = threading.Event()
+    ran = []
+
+    def slow(name):
+        ran.append(name)
+        release.wait(5)
+        return name
+
+    with pytest.raises(PasswordHashingBusy):
+        hasher._run(slow, "running") # Times out while running: its slot stays taken
+    with pytest.raises(PasswordHashingBusy):
+        hasher._run(slow, "queued") # Times out while queued: cancelled, its slot is freed
+    with pytest.raises(PasswordHashingBusy):
+        hasher._run(slow, "queued again")
+    assert ran == ["running"]
+
+    release.set()
+    assert hasher._run(slow, "after") == "after"
+    assert ran == ["running", "after"]
+
+
+def test_no_slot_is_busy_without_queueing(hasher):
+    release = threading.Event()
+    ran = []
+
+    def slow(name):
+        ran.append(name)
+        release.wait(5)
+
+    hasher.configure(method=hasher.method, workers=1, max_queue=0, timeout=0.05)
+    with pytest.raises(PasswordHashingBusy):
+        hasher._run(slow, "running")
+    with pytest.raises(PasswordHashingBusy):
+        hasher._run(slow, "rejected")
+    release.set()
+    assert ran == ["running"]
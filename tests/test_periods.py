@@ -0,0 +1,25 @@
+from datetime import date
+
+import pytest
+
+from conftest import auth
+from src.utils.periods import GRANULARITIES, MAX_BUCKETS, bucket_count, iter_buckets
+
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+@pytest.mark.parametrize("start, end", [
+    (date(2024, 1, 1), date(2024, 1, 1)),
+    (date(2023, 12, 31), date(2024, 1, 1)),
+    (date(2024, 2, 29), date(2025, 3, 3)),
+    (date(2021, 5, 17), date(2024, 11, 30)),
+])
+def test_bucket_count_matches_the_enumerated_buckets(granularity, start, end):
+    assert bucket_count(start, end, granularity) == len(list(iter_buckets(start, end, granularity)))
+
+
+@pytest.mark.parametrize("granularity", ["day", "year"])
+def test_series_over_too_many_buckets_is_rejected(client, company, owner, granularity):
+    response = client.get(f"/api/companies/{company}/reports/profit_and_loss?start_date=0001-01-01&end_date=9999-12-31&granularity={granularity}",
+                          headers=auth(owner[1]))
+    assert response.status_code == 400
+    assert f"at most {MAX_BUCKETS}" in response.json["message"]
@@ -0,0 +1,111 @@
+"""
+Query plans of the company-scoped hot queries.
+
+The queries behind the list and report endpoints are built the same way the blueprints build them,
+and EXPLAIN QUERY PLAN (SQLite) must show that each of them searches an index instead of scanning
+a whole table. Run after changing a model's indexes or an endpoint's filters or ORDER BY.
+"""
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import func
+from src.main import app as flask_app
+from src.extensions import db
+from src.models.company_user import CompanyUser
+from src.models.income import Income
+from src.models.expense import Expense
+from src.models.invoice import Invoice, InvoiceItem
+from src.models.inventory_item import InventoryItem
+from src.models.employee import Employee
+from src.models.salary import Salary
+from src.models.daily_aggregate import DailyIncomeAgg, DailyExpenseAgg
+from src.utils.aggregates import payroll_by_employee
+from src.utils.inventory_valuation import valuation_details_query
+from src.utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_query
+
+# "SCAN income" (SQLite 3.36+) or "SCAN TABLE income" (older releases), possibly followed by "USING ... INDEX"
+SCAN_LINE = re.compile(r"^SCAN (TABLE )?(\w+)")
+
+
+def hot_queries(company_id=1, start_date=date(2024, 1, 1), end_date=date(2024, 12, 31)):
+    """Returns [(name, statement)] for the queries behind the company-scoped list and report endpoints."""
+    page = DEFAULT_PAGE_SIZE + 1
+
+    def listing(query, order_columns, descending=False):
+        # A page past the first one, so the keyset condition is part of the plan
+        cursor = encode_cursor([start_date if isinstance(c.type, db.Date) else ("m" if isinstance(c.type, db.String) else 1) for c in order_columns])
+        return keyset_query(query, order_columns, descending, cursor).limit(page)
+
+    income_range = (Income.company_id == company_id, Income.date_received >= start_date, Income.date_received <= end_date)
+    expense_range = (Expense.company_id == company_id, Expense.date_incurred >= start_date, Expense.date_incurred <= end_date)
+    invoice_range = (Invoice.company_id == company_id, Invoice.issue_date >= start_date, Invoice.issue_date <= end_date)
+    salary_range = (Employee.company_id == company_id, Salary.payment_date >= start_date, Salary.payment_date <= end_date)
+    queries = [
+        ("income list", listing(Income.query.filter_by(company_id=company_id), [Income.date_received, Income.id], descending=True)),
+        ("income list by category", listing(Income.query.filter_by(company_id=company_id, category="Sales"), [Income.date_received, Income.id], descending=True)),
+        ("expense list", listing(Expense.query.filter_by(company_id=company_id), [Expense.date_incurred, Expense.id], descending=True)),
+        ("expense list by vendor", listing(Expense.query.filter_by(company_id=company_id, vendor="Acme"), [Expense.date_incurred, Expense.id], descending=True)),
+        ("invoice list", listing(Invoice.query.filter_by(company_id=company_id), [Invoice.issue_date, Invoice.id], descending=True)),
+        ("invoice list by status", listing(Invoice.query.filter_by(company_id=company_id, status="Paid"), [Invoice.issue_date, Invoice.id], descending=True)),
+        ("invoice items of a page", InvoiceItem.query.filter(InvoiceItem.invoice_id.in_([1, 2, 3]))),
+        ("inventory list", listing(InventoryItem.query.filter_by(company_id=company_id), [InventoryItem.name, InventoryItem.id])),
+        ("employee list", listing(Employee.query.filter_by(company_id=company_id), [Employee.last_name, Employee.first_name, Employee.id])),
+        ("salary list", listing(Salary.query.filter_by(employee_id=1), [Salary.payment_date, Salary.id], descending=True)),
+        ("company members", listing(CompanyUser.query.join(CompanyUser.user).filter(CompanyUser.company_id == company_id), [CompanyUser.user_id])),
+        ("profit and loss income", db.session.query(func.sum(DailyIncomeAgg.total)).filter(
+            DailyIncomeAgg.company_id == company_id, DailyIncomeAgg.day >= start_date, DailyIncomeAgg.day <= end_date)),
+        ("profit and loss expenses", db.session.query(func.sum(DailyExpenseAgg.total)).filter(
+            DailyExpenseAgg.company_id == company_id, DailyExpenseAgg.day >= start_date, DailyExpenseAgg.day <= end_date)),
+        ("income in range", db.session.query(func.sum(Income.amount)).filter(*income_range)),
+        ("sales report totals", db.session.query(func.sum(Invoice.total_amount), func.count(Invoice.id)).filter(*invoice_range)),
+        ("sales report details", listing(Invoice.query.filter(*invoice_range), [Invoice.issue_date, Invoice.id])),
+        ("expense report by vendor", db.session.query(Expense.vendor, func.sum(Expense.amount)).filter(*expense_range).group_by(Expense.vendor)),
+        ("expense report details", listing(Expense.query.filter(*expense_range), [Expense.date_incurred, Expense.id])),
+        ("payroll report totals", db.session.query(func.sum(Salary.net_amount)).join(Employee, Salary.employee_id == Employee.id).filter(*salary_range)),
+        ("payroll by employee (rollup)", payroll_by_employee(company_id, start_date.year, end_date.year)),
+        ("inventory valuation", valuation_details_query(company_id).order_by(InventoryItem.name, InventoryItem.id).limit(page)),
+    ]
+    return [(name, getattr(query, "statement", query)) for name, query in queries]
+
+
+def explain(statement):
+    """Returns the EXPLAIN QUERY PLAN detail lines of a statement."""
+    connection = db.session.connection()
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def table_scans(plan):
+    """The plan lines that read a whole application table (with or without an index) rather than searching it."""
+    tables = db.metadata.tables
+    return [line for line in plan if (match := SCAN_LINE.match(line)) and match.group(2) in tables]
+
+
+@pytest.mark.parametrize("line, scanned", [
+    ("SCAN income", True),
+    ("SCAN TABLE income", True),
+    ("SCAN TABLE income USING INDEX ix_income_company_date", True),
+    ("SCAN expenses USING COVERING INDEX ix_expenses_company_date", True),
+    ("SEARCH income USING INDEX ix_income_company_date (company_id=? AND date_received>?)", False),
+    ("SEARCH TABLE income USING INDEX ix_income_company_date (company_id=?)", False),
+    ("SCAN CONSTANT ROW", False),
+    ("USE TEMP B-TREE FOR ORDER BY", False),
+])
+def test_table_scans_detects_both_plan_formats(app, line, scanned):
+    with app.app_context():
+        assert bool(table_scans([line])) is scanned
+
+
+with flask_app.app_context(): # Building the queries needs the app's session, not a database
+    HOT_QUERY_NAMES = [name for name, _ in hot_queries()]
+
+
+@pytest.mark.parametrize("name", HOT_QUERY_NAMES)
+def test_hot_query_searches_an_index(app, backend, name):
+    if backend != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN checks are SQLite only")
+    with app.app_context():
+        statement = dict(hot_queries())[name]
+        plan = explain(statement)
+        assert table_scans(plan) == [], "\n".join(plan)
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from conftest import auth
+from src.extensions import db, access_cache
+from src.models.enums import RoleEnum
+from src.models.revoked_token import RevokedToken
+from src.models.user import User
+from src.utils.revocation import revocation_index, purge_expired_tokens
+
+
+@pytest.fixture
+def admin(app, make_user):
+    user_id, token = make_user("admin")
+    with app.app_context():
+        db.session.get(User, user_id).role = RoleEnum.SYSTEM_ADMIN
+        db.session.commit()
+    access_cache.clear()
+    return user_id, token
+
+
+@pytest.mark.parametrize("user_id", [999999, "zzz", True, 1.5])
+def test_revoke_rejects_unknown_user_id(client, admin, user_id):
+    response = client.post("/api/tokens/revoke", json={"jti": "some-jti", "user_id": user_id}, headers=auth(admin[1]))
+    assert response.status_code == 400
+    assert revocation_index.is_revoked("some-jti") is False
+
+
+def test_admin_revocation_expires_and_is_purged(app, client, admin):
+    response = client.post("/api/tokens/revoke", json={"jti": "admin-revoked", "user_id": admin[0]}, headers=auth(admin[1]))
+    assert response.status_code == 200
+    with app.app_context():
+        row = RevokedToken.query.filter_by(jti="admin-revoked").one()
+        assert row.user_id == admin[0]
+        assert row.expires_at is not None
+        assert row.expires_at <= datetime.utcnow() + app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+
+        row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+    result = app.test_cli_runner().invoke(purge_expired_tokens)
+    assert "Purged 1 expired revoked token(s)" in result.output
+
+
+def test_concurrent_revocation_of_the_same_jti(app):
+    with app.app_context():
+        def revoke_elsewhere(session, flush_context, instances):
+            # Another request commits the same jti between the existence check and this commit
+            with db.engine.begin() as connection:
+                connection.execute(RevokedToken.__table__.insert().values(jti="raced"))
+
+        event.listen(db.session, "before_flush", revoke_elsewhere, once=True)
+        revocation_index.revoke("raced")
+        assert RevokedToken.query.filter_by(jti="raced").count() == 1
+    assert revocation_index.is_revoked("raced")
+
+
+def test_logout_revokes_the_token(client, make_user):
+    _, token = make_user("someone")
+    assert client.post("/api/logout", headers=auth(token)).status_code == 200
+    assert client.get("/api/companies/", headers=auth(token)).status_code == 401
+
+
+def test_sync_picks_up_rows_committed_out_of_order(app, monkeypatch):
+    monkeypatch.setattr(revocation_index, "sync_seconds", 0)
+    now = datetime.utcnow()
+    with app.app_context():
+        insert = RevokedToken.__table__.insert()
+        db.session.execute(insert.values(id=100, jti="newer", revoked_at=now))
+        db.session.commit()
+        assert revocation_index.is_revoked("newer")
+        # A transaction that took a lower id and an earlier revoked_at commits afterwards
+        db.session.execute(insert.values(id=50, jti="older", revoked_at=now - timedelta(seconds=10)))
+        db.session.commit()
+        assert revocation_index.is_revoked("older")
+
+
+def test_periodic_reload_drops_purged_rows(app, monkeypatch):
+    with app.app_context():
+        revocation_index.revoke("purged")
+        assert revocation_index.is_revoked("purged")
+        RevokedToken.query.filter_by(jti="purged").delete()
+        db.session.commit()
+        monkeypatch.setattr(revocation_index, "reload_seconds", 0)
+        assert revocation_index.is_revoked("purged") is False
+        assert revocation_index.stats()["revoked_tokens"] == 0
@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from conftest import auth
+
+
+@pytest.fixture
+def expenses(client, company, owner):
+    for description, vendor, notes in [
+        ("Office chairs", "Furniture World", "Ergonomic seating for the design team"),
+        ("Printer toner", "Paper Supplies Ltd", "Black cartridges"),
+    ]:
+        response = client.post(f"/api/companies/{company}/expenses", headers=auth(owner[1]), json={
+            "description": description, "amount": 120.0, "date_incurred": "2024-03-01", "category": "Office",
+            "vendor": vendor, "notes": notes})
+        assert response.status_code == 201, response.json
+
+
+def search(client, company, owner, q):
+    return client.get(f"/api/companies/{company}/search", query_string={"q": q}, headers=auth(owner[1]))
+
+
+@pytest.mark.parametrize("q, term", [("ergonomic", "ergonomic"), ("cartri", "cartridges"), ("furniture", "furniture")])
+def test_snippet_highlights_the_matched_body_text(client, company, owner, expenses, backend, q, term):
+    if backend != "sqlite":
+        pytest.skip("Full-text search is SQLite only")
+    response = search(client, company, owner, q)
+    assert response.status_code == 200
+    [result] = response.json["results"]
+    assert f"[{term}]" in result["snippet"].lower()
+    assert not re.search(r"\[c\d+\]", result["snippet"]) # Not the company key
+
+
+def test_snippet_falls_back_to_the_title(client, company, owner, expenses, backend):
+    if backend != "sqlite":
+        pytest.skip("Full-text search is SQLite only")
+    [result] = search(client, company, owner, "chairs").json["results"]
+    assert result["title"] == "Office chairs"
+    assert "[chairs]" in result["snippet"]
+
+
+def test_search_is_scoped_to_the_company(client, company, owner, expenses, make_user, backend):
+    if backend != "sqlite":
+        pytest.skip("Full-text search is SQLite only")
+    _, other = make_user("other")
+    other_company = client.post("/api/companies/", json={"name": "Other"}, headers=auth(other)).json["id"]
+    assert search(client, other_company, (None, other), "ergonomic").json["results"] == []
+
+
+def test_search_is_not_implemented_on_other_databases(client, company, owner, backend):
+    if backend == "sqlite":
+        pytest.skip("SQLite has full-text search")
+    assert search(client, company, owner, "anything").status_code == 501